@@ -1,19 +1,43 @@
 from django.contrib import admin
-from attendance.models import Attendance
-from import_export.admin import ImportExportModelAdmin
+from attendance.models import Attendance, MonthlyAttendanceCounter
+from import_export.admin import ExportMixin, ImportExportModelAdmin
+from identity.imports import BackgroundImportMixin
 
 
 
 @admin.register(Attendance)
-class AttendanceAdmin(ImportExportModelAdmin):
+class AttendanceAdmin(BackgroundImportMixin, ImportExportModelAdmin):
     list_display = ('id', 'user_group', 'status', 'date', 'get_student_full_name', 'created_at', 'updated_at')
     list_filter = ('status', 'date', 'user_group__group', 'created_at', 'updated_at')
     search_fields = ('user_group__student_full_name', 'user_group__student_passport_id', 'user_group__group__group_name')
     list_editable = ('status', )
+    list_select_related = ('user_group__group', )
     list_per_page = 10
     ordering = ('-date',)
 
     def get_student_full_name(self, obj):
         """Returns the student's full name from the user_group."""
         return obj.user_group.student_full_name
-    get_student_full_name.short_description = "Student Full Name"
\ No newline at end of file
+    get_student_full_name.short_description = "Student Full Name"
+
+
+@admin.register(MonthlyAttendanceCounter)
+class MonthlyAttendanceCounterAdmin(ExportMixin, admin.ModelAdmin):
+    """
+    The counters are derived from the attendance records, they are only rebuilt by
+    the rebuild_attendance_counters command.
+    """
+    list_display = ('id', 'user_group', 'year', 'month', 'present', 'absent', 'late', 'excused', 'updated_at')
+    list_filter = ('year', 'month', 'user_group__group')
+    search_fields = ('user_group__student_full_name', 'user_group__student_passport_id', 'user_group__group__group_name')
+    list_select_related = ('user_group', 'user_group__group')
+    ordering = ('-year', '-month')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,121 @@
+from collections import defaultdict
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from attendance.models import Attendance, MonthlyAttendanceCounter
+from salary.models import SalarySnapshot
+from services.periods import MAX_YEAR, MIN_YEAR, get_month_range
+
+
+STATUSES = Attendance.Status.values
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly attendance counters from the attendance records, or only verify them with --verify."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report the counters that differ from the attendance records, without changing them.",
+        )
+        parser.add_argument("--year", type=int, help="Limit the rebuild to this year.")
+        parser.add_argument("--month", type=int, help="Limit the rebuild to this month of --year.")
+
+    def handle(self, *args, **options):
+        year = options["year"]
+        month = options["month"]
+        if month and not year:
+            raise CommandError("--month requires --year.")
+        if month and not (1 <= month <= 12):
+            raise CommandError("--month must be 1-12.")
+        if year and not (MIN_YEAR <= year <= MAX_YEAR):
+            raise CommandError(f"--year must be {MIN_YEAR}-{MAX_YEAR}.")
+
+        expected = self.count_attendance(year, month)
+        counters = self.get_counters(year, month)
+
+        mismatched = sorted(
+            key for key in expected.keys() | counters.keys()
+            if expected.get(key, dict.fromkeys(STATUSES, 0)) != self.get_counts(counters.get(key))
+        )
+
+        if options["verify"]:
+            for user_group_id, counter_year, counter_month in mismatched:
+                self.stdout.write(f"Mismatch for user group {user_group_id} in {counter_month}/{counter_year}.")
+            if mismatched:
+                raise CommandError(f"{len(mismatched)} of {len(expected)} counters are out of sync.")
+            self.stdout.write(self.style.SUCCESS(f"All {len(expected)} counters are in sync."))
+            return
+
+        with transaction.atomic():
+            self.rebuild(mismatched, expected, counters)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(mismatched)} of {len(expected)} counters."))
+
+    def get_date_filter(self, year, month):
+        if not year:
+            return Q()
+        if not month:
+            return Q(date__gte=date(year, 1, 1), date__lt=date(year + 1, 1, 1))
+        month_start, next_month = get_month_range(year, month)
+        return Q(date__gte=month_start, date__lt=next_month)
+
+    def count_attendance(self, year, month):
+        """
+        Count the attendance records per user group, month and status.
+        """
+        rows = (
+            Attendance.objects
+            .filter(self.get_date_filter(year, month))
+            .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+            .values("user_group_id", "year", "month")
+            .annotate(**{status: Count("id", filter=Q(status=status)) for status in STATUSES})
+            .order_by()
+        )
+        return {
+            (row["user_group_id"], row["year"], row["month"]): {status: row[status] for status in STATUSES}
+            for row in rows
+        }
+
+    def get_counters(self, year, month):
+        counters = MonthlyAttendanceCounter.objects.all()
+        if year:
+            counters = counters.filter(year=year)
+        if month:
+            counters = counters.filter(month=month)
+        return {(counter.user_group_id, counter.year, counter.month): counter for counter in counters}
+
+    def get_counts(self, counter):
+        return {status: getattr(counter, status, 0) for status in STATUSES}
+
+    def rebuild(self, mismatched, expected, counters):
+        to_create = []
+        to_update = []
+        to_delete = []
+        for key in mismatched:
+            user_group_id, year, month = key
+            counter = counters.get(key)
+            if key not in expected:
+                to_delete.append(counter.id)
+            elif counter is None:
+                to_create.append(MonthlyAttendanceCounter(user_group_id=user_group_id, year=year, month=month, **expected[key]))
+            else:
+                for status, count in expected[key].items():
+                    setattr(counter, status, count)
+                to_update.append(counter)
+
+        MonthlyAttendanceCounter.objects.filter(id__in=to_delete).delete()
+        MonthlyAttendanceCounter.objects.bulk_create(to_create, batch_size=1000)
+        MonthlyAttendanceCounter.objects.bulk_update(to_update, STATUSES, batch_size=1000)
+
+        # The salary snapshots of the rebuilt months were computed from wrong counters
+        user_groups_by_period = defaultdict(set)
+        for user_group_id, year, month in mismatched:
+            user_groups_by_period[(year, month)].add(user_group_id)
+        for (year, month), user_group_ids in user_groups_by_period.items():
+            SalarySnapshot.objects.mark_dirty(user_group_ids, year, month)
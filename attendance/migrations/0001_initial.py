@@ -24,7 +24,6 @@ class Migration(migrations.Migration):
             options={
                 'verbose_name': 'Attendance',
                 'verbose_name_plural': 'Attendance Records',
-                'constraints': [models.UniqueConstraint(fields=('date', 'user_group'), name='unique_attendance_per_user_group_and_date')],
             },
         ),
     ]
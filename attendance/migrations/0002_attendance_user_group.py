@@ -18,4 +18,8 @@ class Migration(migrations.Migration):
             field=models.ForeignKey(default='62e24575-3873-4760-ab7b-b6eb1e00d502', help_text='The user group to which the attendance record belongs.', on_delete=django.db.models.deletion.CASCADE, related_name='attendance_user_group', to='group.usergroup', verbose_name='User Group'),
             preserve_default=False,
         ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('date', 'user_group'), name='unique_attendance_per_user_group_and_date'),
+        ),
     ]
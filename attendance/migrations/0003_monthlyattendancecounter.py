@@ -0,0 +1,60 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:58
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+STATUSES = ['present', 'absent', 'late', 'excused']
+
+
+def populate_counters(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    MonthlyAttendanceCounter = apps.get_model('attendance', 'MonthlyAttendanceCounter')
+
+    rows = (
+        Attendance.objects
+        .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+        .values('user_group_id', 'year', 'month')
+        .annotate(**{status: Count('id', filter=Q(status=status)) for status in STATUSES})
+        .order_by()
+    )
+    MonthlyAttendanceCounter.objects.bulk_create(
+        (MonthlyAttendanceCounter(**row) for row in rows),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_attendance_user_group'),
+        ('group', '0008_group_group_salary_for_teacher_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyAttendanceCounter',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Year')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Month')),
+                ('present', models.PositiveIntegerField(default=0, verbose_name='Present')),
+                ('absent', models.PositiveIntegerField(default=0, verbose_name='Absent')),
+                ('late', models.PositiveIntegerField(default=0, verbose_name='Late')),
+                ('excused', models.PositiveIntegerField(default=0, verbose_name='Excused')),
+                ('user_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_counters', to='group.usergroup', verbose_name='User Group')),
+            ],
+            options={
+                'verbose_name': 'Monthly Attendance Counter',
+                'verbose_name_plural': 'Monthly Attendance Counters',
+                'indexes': [models.Index(fields=['year', 'month'], name='attendance_counter_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user_group', 'year', 'month'), name='unique_attendance_counter_per_user_group_and_month')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_monthlyattendancecounter'),
+        ('group', '0008_group_group_salary_for_teacher_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['user_group', 'date'], name='attendance_user_group_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date'], name='attendance_date_idx'),
+        ),
+    ]
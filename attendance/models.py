@@ -1,9 +1,16 @@
-from django.db import models
+from collections import defaultdict
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils.translation import gettext_lazy as _
 from group.models import UserGroup
 from services.abstract_models import TimeStampedModel
 
 
+# Fields whose previous values are needed to update the counters of a moved record
+TRACKED_FIELDS = ("user_group_id", "date", "status")
+
+
 class Attendance(TimeStampedModel):
     class Status(models.TextChoices):
         PRESENT = 'present', _("Present")       # İştirak: Tələbə dərsdə iştirak edib.
@@ -29,6 +36,36 @@ class Attendance(TimeStampedModel):
         help_text=_("The user group to which the attendance record belongs.")
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Keep the loaded values to know which user group, date and status a saved record is moved from,
+        # unless some of them were deferred
+        loaded_values = dict(zip(field_names, values))
+        if all(name in loaded_values for name in TRACKED_FIELDS):
+            instance._loaded_values = {name: loaded_values[name] for name in TRACKED_FIELDS}
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Save the record and update the dependent counters in the same transaction.
+        """
+        with transaction.atomic():
+            if not self._state.adding and getattr(self, "_loaded_values", None) is None:
+                # Loaded with deferred fields, read the values the record is moved from
+                self._loaded_values = (
+                    Attendance.objects.filter(pk=self.pk).values(*TRACKED_FIELDS).first()
+                )
+            super().save(*args, **kwargs)
+        self._loaded_values = {
+            "user_group_id": self.user_group_id,
+            "date": self.date,
+            "status": self.status,
+        }
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user_group.student_full_name} - {self.date} - {self.status}"
@@ -39,3 +76,150 @@ class Attendance(TimeStampedModel):
         constraints = [
             models.UniqueConstraint(fields=['date', 'user_group'], name='unique_attendance_per_user_group_and_date')
         ]
+        indexes = [
+            models.Index(fields=['user_group', 'date'], name='attendance_user_group_date_idx'),
+            models.Index(fields=['date'], name='attendance_date_idx'),
+        ]
+
+
+class MonthlyAttendanceCounterQuerySet(models.QuerySet):
+
+    def apply_changes(self, added=(), removed=()):
+        """
+        Update the counters for the added and removed attendance records, given
+        as (user_group_id, date, status) tuples, with F-expressions.
+        """
+        deltas = defaultdict(lambda: defaultdict(int))
+        for sign, records in ((1, added), (-1, removed)):
+            for user_group_id, date, status in records:
+                deltas[(user_group_id, date.year, date.month)][status] += sign
+
+        deltas = {
+            key: {status: delta for status, delta in status_deltas.items() if delta}
+            for key, status_deltas in deltas.items()
+        }
+        deltas = {key: status_deltas for key, status_deltas in deltas.items() if status_deltas}
+
+        with transaction.atomic():
+            if len(deltas) == 1:
+                [(key, status_deltas)] = deltas.items()
+                self._apply_counter_deltas(*key, status_deltas)
+            elif deltas:
+                self._bulk_apply_counter_deltas(deltas)
+
+    def _get_counter_expression(self, status, delta):
+        # Never let a counter that drifted out of sync go below zero
+        if delta >= 0:
+            return F(status) + delta
+        return Greatest(F(status) + delta, 0)
+
+    def _apply_counter_deltas(self, user_group_id, year, month, status_deltas):
+        counter = self.filter(user_group_id=user_group_id, year=year, month=month)
+        expressions = {status: self._get_counter_expression(status, delta) for status, delta in status_deltas.items()}
+
+        if counter.update(**expressions):
+            return
+
+        # The counter does not exist yet, so it only has the records being added
+        added = {status: delta for status, delta in status_deltas.items() if delta > 0}
+        if not added:
+            return
+
+        try:
+            with transaction.atomic():
+                self.create(user_group_id=user_group_id, year=year, month=month, **added)
+        except IntegrityError:
+            # Created concurrently in the meantime
+            counter.update(**expressions)
+
+    def _bulk_apply_counter_deltas(self, deltas):
+        """
+        Apply the deltas of many counters with one select, one bulk update and one bulk insert.
+        """
+        counters = {
+            (counter.user_group_id, counter.year, counter.month): counter
+            for counter in self.select_for_update().filter(
+                user_group_id__in={user_group_id for user_group_id, year, month in deltas},
+                year__in={year for user_group_id, year, month in deltas},
+                month__in={month for user_group_id, year, month in deltas},
+            )
+        }
+
+        statuses = {status for status_deltas in deltas.values() for status in status_deltas}
+        to_update = []
+        to_create = {}
+        for key, status_deltas in deltas.items():
+            counter = counters.get(key)
+            if counter is not None:
+                for status in statuses:
+                    setattr(counter, status, self._get_counter_expression(status, status_deltas.get(status, 0)))
+                to_update.append(counter)
+                continue
+
+            added = {status: delta for status, delta in status_deltas.items() if delta > 0}
+            if added:
+                user_group_id, year, month = key
+                to_create[key] = self.model(user_group_id=user_group_id, year=year, month=month, **added)
+
+        if to_update:
+            self.bulk_update(to_update, list(statuses))
+
+        if to_create:
+            try:
+                with transaction.atomic():
+                    self.bulk_create(to_create.values())
+            except IntegrityError:
+                # Some counters were created concurrently in the meantime
+                for key in to_create:
+                    self._apply_counter_deltas(*key, deltas[key])
+
+
+class MonthlyAttendanceCounter(TimeStampedModel):
+    """
+    Running attendance status counts of a user group for a month, kept up to
+    date on every attendance change so reports do not count the attendance table.
+    The field names match the attendance status values.
+    """
+    user_group = models.ForeignKey(
+        to=UserGroup,
+        on_delete=models.CASCADE,
+        related_name="attendance_counters",
+        verbose_name=_("User Group")
+    )
+    year = models.PositiveSmallIntegerField(
+        verbose_name=_("Year")
+    )
+    month = models.PositiveSmallIntegerField(
+        verbose_name=_("Month")
+    )
+    present = models.PositiveIntegerField(
+        verbose_name=_("Present"),
+        default=0
+    )
+    absent = models.PositiveIntegerField(
+        verbose_name=_("Absent"),
+        default=0
+    )
+    late = models.PositiveIntegerField(
+        verbose_name=_("Late"),
+        default=0
+    )
+    excused = models.PositiveIntegerField(
+        verbose_name=_("Excused"),
+        default=0
+    )
+
+    objects = MonthlyAttendanceCounterQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.user_group} - {self.month}/{self.year}"
+
+    class Meta:
+        verbose_name = _("Monthly Attendance Counter")
+        verbose_name_plural = _("Monthly Attendance Counters")
+        constraints = [
+            models.UniqueConstraint(fields=['user_group', 'year', 'month'], name='unique_attendance_counter_per_user_group_and_month')
+        ]
+        indexes = [
+            models.Index(fields=['year', 'month'], name='attendance_counter_period_idx')
+        ]
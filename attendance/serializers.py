@@ -1,6 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
 from group.models import Group, UserGroup
 from .models import Attendance
+from .signals import attendance_changed
 from django.utils.translation import gettext_lazy as _
 
 
@@ -65,3 +67,163 @@ class AttendanceListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attendance
         fields = ['id', 'student_full_name', 'student_passport_id', 'group_name', 'status', 'date']
+
+
+class AttendanceBulkRecordSerializer(serializers.Serializer):
+    student_passport_id = serializers.CharField(help_text=_("The passport ID of the student."))
+    status = serializers.ChoiceField(choices=Attendance.Status.choices, help_text=_("The attendance status of the student."))
+
+
+class AttendanceBulkCreateSerializer(serializers.Serializer):
+    group_name = serializers.CharField(help_text=_("The name of the group."))
+    date = serializers.DateField(help_text=_("The date of the class the attendance is submitted for."))
+    records = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=500,
+        help_text=_("The attendance of the students, as a list of {student_passport_id, status} objects.")
+    )
+    atomic = serializers.BooleanField(
+        default=False,
+        help_text=_("Reject all records if any of them is invalid, instead of saving the valid ones.")
+    )
+    upsert = serializers.BooleanField(
+        default=False,
+        help_text=_("Update the status of the students who already have attendance on this date, instead of rejecting them.")
+    )
+
+    def validate(self, attrs):
+        """
+        Resolve the group, its user groups and the existing attendance with one query each,
+        collecting the errors of every record instead of failing on the first one.
+        """
+        group_name = attrs['group_name']
+        date = attrs['date']
+
+        # Check if the group exists and is active
+        group = Group.objects.filter(group_name=group_name).first()
+        if not group:
+            raise serializers.ValidationError({"group_name": _("Group with this name does not exist.")})
+        if group.status != Group.Status.ACTIVE:
+            raise serializers.ValidationError({"group_name": _("The specified group is not active.")})
+
+        records = []
+        errors = {}
+        for index, data in enumerate(attrs['records']):
+            record_serializer = AttendanceBulkRecordSerializer(data=data)
+            if record_serializer.is_valid():
+                records.append((index, record_serializer.validated_data))
+            else:
+                errors[index] = record_serializer.errors
+
+        user_groups = {
+            user_group.student_passport_id: user_group
+            for user_group in UserGroup.objects.filter(
+                group=group,
+                student_passport_id__in=[record['student_passport_id'] for index, record in records]
+            )
+        }
+        existing_user_group_ids = set(
+            Attendance.objects.filter(
+                user_group__in=user_groups.values(),
+                date=date
+            ).values_list('user_group_id', flat=True)
+        )
+
+        valid_records = []
+        seen_passport_ids = set()
+        for index, record in records:
+            student_passport_id = record['student_passport_id']
+            user_group = user_groups.get(student_passport_id)
+
+            if student_passport_id in seen_passport_ids:
+                error = {"student_passport_id": [_("The student is submitted more than once.")]}
+            elif not user_group:
+                error = {"student_passport_id": [_("Student is not part of the specified group.")]}
+            elif user_group.status != UserGroup.Status.ACTIVE:
+                error = {"student_passport_id": [_("The student is not in an active group.")]}
+            elif user_group.id in existing_user_group_ids and not attrs['upsert']:
+                error = {"date": [_("Attendance for this student on this date already exists.")]}
+            else:
+                error = None
+
+            seen_passport_ids.add(student_passport_id)
+            if error:
+                errors[index] = error
+            else:
+                valid_records.append(Attendance(user_group=user_group, date=date, status=record['status']))
+
+        errors = dict(sorted(errors.items()))
+        if errors and (attrs['atomic'] or not valid_records):
+            raise serializers.ValidationError({"records": errors})
+
+        attrs['group'] = group
+        attrs['attendance'] = valid_records
+        attrs['errors'] = errors
+        return attrs
+
+    def create(self, validated_data):
+        """
+        Insert the valid records with a single bulk insert.
+
+        In upsert mode the existing records of the day are updated by the same statement,
+        relying on the unique (date, user_group) constraint instead of checking first.
+        """
+        attendance = validated_data['attendance']
+
+        with transaction.atomic():
+            if not validated_data['upsert']:
+                Attendance.objects.bulk_create(attendance)
+                attendance_changed.send(
+                    sender=Attendance,
+                    added=[(record.user_group_id, record.date, record.status) for record in attendance],
+                    removed=[]
+                )
+                return {"created": attendance, "updated": []}
+
+            # Lock the rows being overwritten, so their previous status is known for the counters
+            existing = {
+                user_group_id: (attendance_id, status)
+                for user_group_id, attendance_id, status in Attendance.objects.select_for_update().filter(
+                    user_group_id__in=[record.user_group_id for record in attendance],
+                    date=validated_data['date']
+                ).values_list('user_group_id', 'id', 'status')
+            }
+            Attendance.objects.bulk_create(
+                attendance,
+                update_conflicts=True,
+                unique_fields=['date', 'user_group'],
+                update_fields=['status', 'updated_at']
+            )
+
+            created, updated, removed = [], [], []
+            for record in attendance:
+                if record.user_group_id in existing:
+                    # Not every backend returns the primary key of the updated rows
+                    record.id, status = existing[record.user_group_id]
+                    updated.append(record)
+                    removed.append((record.user_group_id, record.date, status))
+                else:
+                    created.append(record)
+            attendance_changed.send(
+                sender=Attendance,
+                added=[(record.user_group_id, record.date, record.status) for record in attendance],
+                removed=removed
+            )
+
+        return {"created": created, "updated": updated}
+
+    def to_representation(self, instance):
+        def represent(record):
+            return {
+                "id": record.id,
+                "student_passport_id": record.user_group.student_passport_id,
+                "status": record.status,
+                "date": record.date,
+            }
+
+        return {
+            "created": [represent(record) for record in instance['created']],
+            "updated": [represent(record) for record in instance['updated']],
+            "errors": self.validated_data['errors'],
+        }
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from attendance.models import Attendance, MonthlyAttendanceCounter
+
+
+# Sent whenever attendance records are added or removed, including bulk inserts
+# that bypass the model signals. `added` and `removed` are lists of
+# (user_group_id, date, status) tuples; an updated record is removed with its
+# loaded values and added with its new ones.
+attendance_changed = Signal()
+
+
+@receiver(post_save, sender=Attendance)
+def send_attendance_changed_on_save(sender, instance, **kwargs):
+    added = [(instance.user_group_id, instance.date, instance.status)]
+    removed = []
+
+    loaded_values = getattr(instance, "_loaded_values", None)
+    if loaded_values:
+        removed.append((loaded_values["user_group_id"], loaded_values["date"], loaded_values["status"]))
+
+    if added != removed:
+        attendance_changed.send(sender=Attendance, added=added, removed=removed)
+
+
+@receiver(post_delete, sender=Attendance)
+def send_attendance_changed_on_delete(sender, instance, **kwargs):
+    attendance_changed.send(
+        sender=Attendance,
+        added=[],
+        removed=[(instance.user_group_id, instance.date, instance.status)]
+    )
+
+
+@receiver(attendance_changed)
+def update_attendance_counters(sender, added, removed, **kwargs):
+    MonthlyAttendanceCounter.objects.apply_changes(added=added, removed=removed)
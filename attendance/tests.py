@@ -1,3 +1,121 @@
+from datetime import date
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from django.urls import NoReverseMatch, reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from attendance.management.commands.rebuild_attendance_counters import Command as RebuildCountersCommand
+from attendance.models import Attendance, MonthlyAttendanceCounter
+from attendance.views import AttendanceListCreateView
+from group.models import Group, UserGroup
+from identity.models import User
+
+
+class AttendanceQueryCountMixin:
+    """
+    Create the attendance records of one group, one record per student and day.
+    """
+
+    def setUp(self):
+        self.group = Group.objects.create(
+            group_name="Group A",
+            teacher_passport_id="TEACHER1",
+            teacher_full_name="Teacher",
+            start_date=date(2020, 1, 1),
+            group_salary_for_teacher=100,
+        )
+
+    def create_attendances(self, count):
+        for index in range(Attendance.objects.count(), Attendance.objects.count() + count):
+            user_group = UserGroup.objects.create(
+                group=self.group,
+                student_passport_id=f"STUDENT{index}",
+                student_full_name=f"Student {index}",
+            )
+            Attendance.objects.create(user_group=user_group, date=date(2024, 1, 1), status=Attendance.Status.PRESENT)
+
+
+class AttendanceListQueryCountTests(AttendanceQueryCountMixin, TestCase):
+    """
+    The attendance list runs the count and the page queries, whatever the size of the page.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.url = reverse("attendance:attendance")
+        self.create_attendances(12)
+
+    def assert_page_queries(self, page_size):
+        params = {"group_name": "Group A", "year": 2024, "month": 1, "page_size": page_size}
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_small_page(self):
+        self.assert_page_queries(2)
+
+    def test_large_page(self):
+        self.assert_page_queries(10)
+
+
+@skipUnless(connection.vendor == "sqlite", "The query plan of other databases depends on their table statistics.")
+class AttendanceMonthFilterIndexTests(TestCase):
+    """
+    The month filters search the date indexes with both bounds of the month, instead of
+    scanning the attendance table or the records of every month.
+    """
+
+    def test_list_uses_user_group_date_index(self):
+        view = AttendanceListCreateView()
+        view.request = view.initialize_request(
+            APIRequestFactory().get("/", {"group_name": "Group A", "year": 2024, "month": 1})
+        )
+        view.format_kwarg = None
+        plan = view.filter_queryset(view.get_queryset()).explain()
+        self.assertIn("attendance_user_group_date_idx (user_group_id=? AND date>? AND date<?)", plan)
+
+    def test_counter_rebuild_uses_date_index(self):
+        plan = Attendance.objects.filter(RebuildCountersCommand().get_date_filter(2024, 1)).explain()
+        self.assertIn("attendance_date_idx (date>? AND date<?)", plan)
+
+
+class AttendanceAdminTests(AttendanceQueryCountMixin, TestCase):
+    """
+    The admin changelist joins the student and the group of the listed records instead of
+    loading them one row at a time, and the derived counters cannot be edited.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_superuser(email="admin@example.com", password="password")
+        self.client.force_login(self.user)
+        self.url = reverse("admin:attendance_attendance_changelist")
+
+    def assert_changelist_queries(self, num):
+        with self.assertNumQueries(num):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_constant_queries(self):
+        # The session, the user, the group filter, the filtered and the total counts, and the page
+        self.create_attendances(2)
+        self.assert_changelist_queries(6)
+
+        self.create_attendances(8)
+        self.assert_changelist_queries(6)
+
+    def test_counters_read_only(self):
+        self.create_attendances(1)
+        counter = MonthlyAttendanceCounter.objects.get()
+        change_url = reverse("admin:attendance_monthlyattendancecounter_change", args=[counter.pk])
 
-# Create your tests here.
+        self.assertEqual(self.client.get(reverse("admin:attendance_monthlyattendancecounter_add")).status_code, 403)
+        self.assertEqual(self.client.post(change_url, {"present": 10}).status_code, 403)
+        with self.assertRaises(NoReverseMatch):
+            reverse("admin:attendance_monthlyattendancecounter_import")
+        counter.refresh_from_db()
+        self.assertEqual(counter.present, 1)
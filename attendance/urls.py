@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import AttendanceListCreateView
+from .views import AttendanceBulkCreateView, AttendanceCalendarView, AttendanceListCreateView
 
 
 app_name = "attendance"
@@ -7,4 +7,6 @@ app_name = "attendance"
 
 urlpatterns = [
     path('attendance/', AttendanceListCreateView.as_view(), name='attendance'),
+    path('attendance/bulk/', AttendanceBulkCreateView.as_view(), name='attendance_bulk'),
+    path('attendance/calendar/', AttendanceCalendarView.as_view(), name='attendance_calendar'),
 ]
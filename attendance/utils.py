@@ -0,0 +1,68 @@
+from django.db.models import FilteredRelation, Q
+from django.utils import timezone
+
+from group.models import UserGroup
+from services.periods import get_month_range, parse_month_period
+from .models import Attendance
+
+
+# Compact codes of the attendance statuses, used by the attendance calendar
+STATUS_CODES = {
+    Attendance.Status.PRESENT: 'P',
+    Attendance.Status.ABSENT: 'A',
+    Attendance.Status.LATE: 'L',
+    Attendance.Status.EXCUSED: 'E',
+}
+
+
+def get_month_params(query_params):
+    """
+    Validate the 'month' and optional 'year' query parameters, the year defaulting
+    to the current one, and return them as a (year, month) pair.
+    """
+    return parse_month_period(
+        query_params.get('year', timezone.localdate().year),
+        query_params.get('month'),
+        required_message="The 'month' query parameter is required."
+    )
+
+
+def build_attendance_calendar(group_name, year, month):
+    """
+    Build the students x days attendance matrix of a group for a month with a single query.
+
+    Returns the ordered students, the ordered dates with attendance and one status code
+    (or None) per student and date.
+    """
+    month_start, next_month = get_month_range(year, month)
+    rows = (
+        UserGroup.objects
+        .annotate(month_attendance=FilteredRelation(
+            'attendance_user_group',
+            condition=Q(attendance_user_group__date__gte=month_start, attendance_user_group__date__lt=next_month)
+        ))
+        .filter(group__group_name=group_name)
+        # Students who left the group are only shown for the months they have attendance in
+        .filter(Q(status=UserGroup.Status.ACTIVE) | Q(month_attendance__isnull=False))
+        .order_by('student_full_name', 'student_passport_id', 'month_attendance__date')
+        .values_list('student_passport_id', 'student_full_name', 'month_attendance__date', 'month_attendance__status')
+    )
+
+    students = {}
+    dates = set()
+    for student_passport_id, student_full_name, date, status in rows:
+        cells = students.setdefault((student_passport_id, student_full_name), {})
+        if date:
+            cells[date] = STATUS_CODES[status]
+            dates.add(date)
+
+    dates = sorted(dates)
+    return {
+        "students": [
+            {"student_passport_id": student_passport_id, "student_full_name": student_full_name}
+            for student_passport_id, student_full_name in students
+        ],
+        "dates": dates,
+        "statuses": {code: status for status, code in STATUS_CODES.items()},
+        "matrix": [[cells.get(date) for date in dates] for cells in students.values()],
+    }
@@ -1,9 +1,14 @@
-from rest_framework.generics import ListCreateAPIView
+from rest_framework import status
+from rest_framework.generics import CreateAPIView, ListAPIView, ListCreateAPIView
+from rest_framework.response import Response
 from .models import Attendance
-from .serializers import AttendanceCreateSerializer, AttendanceListSerializer
+from .serializers import AttendanceBulkCreateSerializer, AttendanceCreateSerializer, AttendanceListSerializer
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
+from group.models import Group
+from services.periods import get_month_range
+from .utils import build_attendance_calendar, get_month_params
 
 
 
@@ -11,7 +16,8 @@ class AttendanceListCreateView(ListCreateAPIView):
     """
     API view for listing & creating attendance records.
     """
-    queryset = Attendance.objects.all()
+    # The listed records show their student and group names
+    queryset = Attendance.objects.select_related('user_group__group')
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['user_group__group__group_name', 'user_group__student_full_name', 'status', 'date']
     search_fields = ['user_group__student_full_name', 'user_group__group__group_name']
@@ -34,18 +40,51 @@ class AttendanceListCreateView(ListCreateAPIView):
 
         # Get query parameters
         group_name = self.request.query_params.get('group_name')
-        month = self.request.query_params.get('month')
 
         # Validate that required parameters are provided
         if not group_name:
             raise ValidationError({"detail": "The 'group_name' query parameter is required."})
-        if not month:
-            raise ValidationError({"detail": "The 'month' query parameter is required."})
+        year, month = get_month_params(self.request.query_params)
 
         # Filter queryset by group name and month
         queryset = queryset.filter(user_group__group__group_name=group_name)
 
-        # Filter by month (assuming the date field is used to filter the month)
-        queryset = queryset.filter(date__month=month)
+        # Filter by a date range instead of the month of the date, so the date indexes can be used
+        month_start, next_month = get_month_range(year, month)
+        queryset = queryset.filter(date__gte=month_start, date__lt=next_month)
 
         return queryset
+
+
+class AttendanceBulkCreateView(CreateAPIView):
+    """
+    API view for submitting the attendance of a whole class day at once.
+    Invalid records are reported per record without rejecting the valid ones, unless 'atomic' is set.
+    With 'upsert' set, re-submitting a day updates the existing records instead of rejecting them.
+    """
+    serializer_class = AttendanceBulkCreateSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class AttendanceCalendarView(ListAPIView):
+    """
+    API view for the attendance of a group in a month as a students x days matrix,
+    with one status code per cell instead of one serialized record per attendance.
+    """
+    def list(self, request, *args, **kwargs):
+        group_name = request.query_params.get('group_name')
+        if not group_name:
+            raise ValidationError({"detail": "The 'group_name' query parameter is required."})
+        year, month = get_month_params(request.query_params)
+
+        calendar = build_attendance_calendar(group_name, year, month)
+        # Only tell an unknown group apart from an empty one when there is nothing to show
+        if not calendar["students"] and not Group.objects.filter(group_name=group_name).exists():
+            raise NotFound({"detail": "Group with this name does not exist."})
+
+        return Response({"group_name": group_name, "year": year, "month": month, **calendar})
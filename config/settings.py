@@ -186,6 +186,19 @@ SIMPLE_JWT = {
     "TOKEN_TYPE_CLAIM": "token_type",
 }
 
+# How access tokens are revoked when their user logs in again:
+# "token" stores every access token and deactivates the previous ones,
+# "generation" only increments the token generation of the user, checked on every request.
+ACCESS_TOKEN_REVOCATION_MODE = "token"
+
+# Cache of the access tokens found active, see identity.token_cache.
+# Use "identity.token_cache.DjangoCacheTokenStateBackend" to share it between workers.
+ACCESS_TOKEN_STATE_CACHE = {
+    "BACKEND": "identity.token_cache.LocalMemoryTokenStateBackend",
+    "TTL": 30,
+    "MAX_SIZE": 10000,
+}
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
@@ -204,9 +217,12 @@ AUTH_USER_MODEL = "identity.User"
 
 AUTHENTICATION_BACKENDS = [
     "identity.backends.CustomModelBackend",
-    "django.contrib.auth.backends.ModelBackend",
 ]
 
+# Cache the role permissions are shared in between workers, see identity.backends.
+# A local memory cache is not shared, the role permissions are then only memoized per request.
+ROLE_PERMISSION_CACHE_ALIAS = "default"
+
 LOGIN_URL = "identity:token_obtain_pair"
 LOGOUT_URL = "identity:logout"
 LOGIN_REDIRECT_URL = "schema-swagger-ui"
@@ -221,5 +237,11 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 FRONTEND_URL = 'localhost:3000'
 
+# Number of months calculated in parallel by the teacher salary report
+SALARY_REPORT_MAX_WORKERS = 4
+
+# Number of processes hashing the initial passwords of bulk imported users, None for one per CPU
+PASSWORD_HASH_MAX_WORKERS = None
+
 IMPORT_EXPORT_FORMATS = [CSV, XLSX]
 
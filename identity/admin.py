@@ -1,7 +1,9 @@
 from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Permission
-from identity.models import AccessToken, User, Role
+from identity.imports import IMPORT_JOB_STALE_TIMEOUT, BackgroundImportMixin
+from identity.models import AccessToken, EmailOutbox, ImportJob, User, Role
+from django.db.models import Q
 from django.utils import timezone
 from django.utils.translation import ngettext_lazy, gettext_lazy as _
 from import_export.admin import ImportExportModelAdmin
@@ -26,7 +28,7 @@ class RoleAdmin(ImportExportModelAdmin):
 
 # Customizing UserAdmin to display additional fields
 @admin.register(User)
-class UserAdmin(BaseUserAdmin, ImportExportModelAdmin):
+class UserAdmin(BackgroundImportMixin, BaseUserAdmin, ImportExportModelAdmin):
     fieldsets = (
         (None, {'fields': ('id', 'email', 'password')}),
         (_('Personal info'), {'fields': ('first_name', 'last_name', 'father_name', 'passport_id', 'profile_image', 'gender', 'user_type')}),
@@ -110,3 +112,46 @@ class AccessTokenAdmin(ImportExportModelAdmin):
 
         self.message_user(request, message, level=messages.SUCCESS)
 
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(ImportExportModelAdmin):
+    list_display = ('subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'created_at', 'sent_at')
+    search_fields = ('subject', 'to')
+    readonly_fields = ('attempts', 'sent_at', 'last_error', 'created_at', 'updated_at')
+    ordering = ('-created_at',)
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    actions = ("action_retry_jobs",)
+    list_display = (
+        'file', 'kind', 'model_label', 'status', 'progress', 'processed_rows', 'total_rows',
+        'created_rows', 'failed_rows', 'created_by', 'created_at', 'finished_at'
+    )
+    list_filter = ('kind', 'status', 'created_at')
+    list_select_related = ('created_by', )
+    readonly_fields = (
+        'kind', 'model_label', 'resource_index', 'input_format', 'created_by', 'status', 'progress',
+        'total_rows', 'processed_rows', 'created_rows', 'failed_rows', 'errors', 'last_error',
+        'created_at', 'updated_at', 'finished_at'
+    )
+    ordering = ('-created_at',)
+
+    @admin.action(description=_("Retry selected failed or abandoned import jobs"))
+    def action_retry_jobs(self, request, queryset):
+        # The run_import_jobs command resumes them after their last committed chunk
+        now = timezone.now()
+        count = queryset.filter(
+            Q(status=ImportJob.Status.FAILED)
+            | Q(status=ImportJob.Status.RUNNING, updated_at__lt=now - IMPORT_JOB_STALE_TIMEOUT)
+        ).update(status=ImportJob.Status.PENDING, updated_at=now)
+
+        message = ngettext_lazy(
+            "Queued {count} import job again.",
+            "Queued {count} import jobs again.",
+            count
+        ).format(count=count)
+
+        self.message_user(request, message, level=messages.SUCCESS)
@@ -2,19 +2,46 @@ from django.utils.translation import gettext_lazy as _
 
 from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
 
 from .models import AccessToken
+from .token_cache import get_token_state_cache, uses_token_generation
+
+# Claim holding the token generation of the user the token was issued for
+TOKEN_GENERATION_CLAIM = "token_generation"
 
 
 class ActiveTokenJWTAuthentication(JWTAuthentication):
     def get_validated_token(self, raw_token):
         validated_token = super().get_validated_token(raw_token)
+        if uses_token_generation():
+            # Checked against the user fetched by get_user, no AccessToken row exists
+            return validated_token
+
+        jti = validated_token["jti"]
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+
+        # Skip the database for the tokens recently found active and not revoked since
+        token_state_cache = get_token_state_cache()
+        if token_state_cache.is_active(jti, user_id):
+            return validated_token
 
+        version = token_state_cache.get_version(user_id)
         try:
-            access_token = AccessToken.objects.get(jti=validated_token["jti"])
+            access_token = AccessToken.objects.get(jti=jti)
             if not access_token.is_active:
                 raise AuthenticationFailed("Token is inactive")
         except AccessToken.DoesNotExist:
             raise AuthenticationFailed("Token not found")
 
+        token_state_cache.remember(jti, version)
         return validated_token
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+
+        # A login increments the token generation of the user, revoking the tokens issued before
+        if uses_token_generation() and validated_token.get(TOKEN_GENERATION_CLAIM) != user.token_generation:
+            raise AuthenticationFailed("Token is inactive")
+
+        return user
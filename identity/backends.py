@@ -1,5 +1,35 @@
+from collections import defaultdict
+
 from django.contrib.auth.backends import BaseBackend, ModelBackend
+from django.conf import settings
 from django.contrib.auth.models import Permission
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+# Seconds the role permissions are cached for, on top of the invalidation by the signals
+ROLE_PERMISSION_CACHE_TIMEOUT = 60 * 60
+
+
+def get_role_permission_cache():
+    """
+    Return the cache the role permissions are shared in, or None when it is not shared
+    between the workers: the signals only invalidate the process handling the change,
+    so a revoked permission would be kept by the other workers until the timeout.
+    """
+    cache = caches[settings.ROLE_PERMISSION_CACHE_ALIAS]
+    if isinstance(cache, (LocMemCache, DummyCache)):
+        return None
+    return cache
+
+
+def get_user_roles_cache_key(user_id):
+    return f"identity:user_roles:{user_id}"
+
+
+def get_role_permissions_cache_key(role_id):
+    return f"identity:role_permissions:{role_id}"
 
 
 class CustomBaseBackend(BaseBackend):
@@ -22,6 +52,10 @@ class CustomModelBackend(CustomBaseBackend, ModelBackend):
     """
     Custom authentication backend that extends ModelBackend to include role-based permissions.
     Authenticates against settings.AUTH_USER_MODEL and checks for role-based permissions.
+
+    The role permissions are memoized on the user object. With a shared cache configured
+    in ROLE_PERMISSION_CACHE_ALIAS, they are also cached per role and the role ids per user,
+    invalidated by the signals of identity.signals.
     """
 
     def _get_permissions(self, user_obj, obj, from_name):
@@ -32,6 +66,14 @@ class CustomModelBackend(CustomBaseBackend, ModelBackend):
         """
         return super()._get_permissions(user_obj, obj, from_name)
 
+    def _get_user_permissions(self, user_obj):
+        # The user model has no user permissions, only roles
+        return Permission.objects.none()
+
+    def _get_group_permissions(self, user_obj):
+        # The user model has no groups, only roles
+        return Permission.objects.none()
+
     def _get_role_permissions(self, user_obj):
         roles = user_obj.roles.all()
         return Permission.objects.filter(role__in=roles)
@@ -41,4 +83,41 @@ class CustomModelBackend(CustomBaseBackend, ModelBackend):
         Return a set of permission strings the user `user_obj` has from the
         roles they belong to.
         """
-        return self._get_permissions(user_obj, obj, "role")
+        if user_obj.is_superuser or not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return self._get_permissions(user_obj, obj, "role")
+
+        if not hasattr(user_obj, "_role_perm_cache"):
+            cache = get_role_permission_cache()
+            if cache is None:
+                return self._get_permissions(user_obj, obj, "role")
+            user_obj._role_perm_cache = self._get_cached_role_permissions(user_obj, cache)
+        return user_obj._role_perm_cache
+
+    def _get_cached_role_permissions(self, user_obj, cache):
+        """
+        Return the permissions of the roles of `user_obj` from the cache, querying
+        only the role ids and role permissions missing from it.
+        """
+        roles_cache_key = get_user_roles_cache_key(user_obj.pk)
+        role_ids = cache.get(roles_cache_key)
+        if role_ids is None:
+            role_ids = list(user_obj.roles.values_list("id", flat=True))
+            cache.set(roles_cache_key, role_ids, ROLE_PERMISSION_CACHE_TIMEOUT)
+
+        cache_keys = {get_role_permissions_cache_key(role_id): role_id for role_id in role_ids}
+        cached = cache.get_many(cache_keys)
+        missing_role_ids = [role_id for cache_key, role_id in cache_keys.items() if cache_key not in cached]
+
+        if missing_role_ids:
+            missing = defaultdict(set)
+            for role_id, app_label, codename in Permission.objects.filter(role__in=missing_role_ids).values_list(
+                "role", "content_type__app_label", "codename"
+            ):
+                missing[role_id].add(f"{app_label}.{codename}")
+            cache.set_many(
+                {get_role_permissions_cache_key(role_id): missing[role_id] for role_id in missing_role_ids},
+                ROLE_PERMISSION_CACHE_TIMEOUT
+            )
+            cached.update((get_role_permissions_cache_key(role_id), missing[role_id]) for role_id in missing_role_ids)
+
+        return set().union(*cached.values())
@@ -0,0 +1,444 @@
+import csv
+import io
+import os
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import tablib
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+
+from import_export.results import RowResult
+from openpyxl import load_workbook
+
+from identity.models import EmailOutbox, ImportJob, Role, User
+from identity.utils import get_registration_email
+
+
+# Number of rows validated and inserted per transaction
+IMPORT_CHUNK_SIZE = 1000
+
+# A running import job not updated for this long is considered abandoned by its worker,
+# every committed chunk updating it
+IMPORT_JOB_STALE_TIMEOUT = timedelta(minutes=15)
+
+REQUIRED_COLUMNS = [
+    'email', 'first_name', 'last_name', 'father_name', 'gender',
+    'phone_number_1', 'passport_id', 'user_type',
+]
+OPTIONAL_COLUMNS = ['phone_number_2', 'bio', 'address', 'roles']
+URL_COLUMNS = ['instagram', 'facebook', 'twitter', 'github', 'youtube', 'linkedin']
+# Columns checked against the max length of their field, the passport ID, the gender and
+# the user type having stricter checks of their own
+LENGTH_COLUMNS = [
+    'email', 'first_name', 'last_name', 'father_name', 'phone_number_1', 'phone_number_2', 'address',
+] + URL_COLUMNS
+
+EMAIL_REGEX = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+PASSPORT_ID_REGEX = r"[A-Za-z0-9]{1,15}"
+# A valid URL has both a scheme and a host
+URL_REGEX = r"[A-Za-z][A-Za-z0-9+.-]*://[^/\s?#]+\S*"
+
+
+def prepare_user_frame(df):
+    """
+    Normalize the columns of an uploaded user file, or raise ValueError if a required column is missing.
+    """
+    df = df.rename(columns=lambda column: str(column).strip())
+    # Older files have a single phone number column
+    if 'phone_number' in df.columns and 'phone_number_1' not in df.columns:
+        df = df.rename(columns={'phone_number': 'phone_number_1'})
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}.")
+
+    for column in OPTIONAL_COLUMNS + URL_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+
+    columns = REQUIRED_COLUMNS + OPTIONAL_COLUMNS + URL_COLUMNS
+    df = df[columns].astype(object)
+    # Cells are compared as stripped strings, empty cells as None
+    df = df.apply(lambda column: column.map(lambda value: str(value).strip() if pd.notna(value) else None))
+    return df.where(df.ne(''), None)
+
+
+def validate_user_frame(df):
+    """
+    Validate every row of a prepared user frame with vectorized checks.
+
+    Returns a dict mapping the row index to its errors by field.
+    """
+    checks = []
+    for column in REQUIRED_COLUMNS:
+        checks.append((column, df[column].isna(), "This field is required."))
+
+    checks += [
+        ('email', df['email'].notna() & ~df['email'].str.fullmatch(EMAIL_REGEX, na=False),
+         "Enter a valid email address."),
+        ('passport_id', df['passport_id'].notna() & ~df['passport_id'].str.fullmatch(PASSPORT_ID_REGEX, na=False),
+         "Passport ID must contain only letters and numbers, at most 15."),
+        ('gender', df['gender'].notna() & ~df['gender'].isin(User.GenderChoices.values),
+         f"Gender must be one of: {', '.join(User.GenderChoices.values)}."),
+        ('user_type', df['user_type'].notna() & ~df['user_type'].isin(User.UserTypeChoices.values),
+         f"User type must be one of: {', '.join(User.UserTypeChoices.values)}."),
+        ('email', df['email'].notna() & df['email'].duplicated(keep='first'),
+         "This email appears more than once in the file."),
+        ('passport_id', df['passport_id'].notna() & df['passport_id'].duplicated(keep='first'),
+         "This passport ID appears more than once in the file."),
+    ]
+
+    for column in LENGTH_COLUMNS:
+        max_length = User._meta.get_field(column).max_length
+        too_long = df[column].notna() & (df[column].str.len() > max_length)
+        # Invalid URLs are dropped on import, only the kept ones are checked
+        if column in URL_COLUMNS:
+            too_long &= df[column].str.fullmatch(URL_REGEX, na=False)
+        checks.append((column, too_long, f"Ensure this value has at most {max_length} characters."))
+
+    errors = {}
+    for field, failed, message in checks:
+        for index in failed[failed].index:
+            errors.setdefault(index, {}).setdefault(field, []).append(message)
+    return errors
+
+
+def hash_passwords(passwords):
+    """
+    Hash the initial passwords of new users across a pool of PASSWORD_HASH_MAX_WORKERS
+    processes (one per CPU by default), the hasher being deliberately slow.
+    """
+    max_workers = min(settings.PASSWORD_HASH_MAX_WORKERS or os.cpu_count() or 1, len(passwords))
+    if max_workers <= 1:
+        return [make_password(password) for password in passwords]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(make_password, passwords, chunksize=-(-len(passwords) // (max_workers * 4))))
+
+
+def import_user_chunk(df, job=None):
+    """
+    Validate and insert a chunk of a prepared user frame in one transaction.
+
+    The roles, and the emails and passport IDs already taken, are resolved with one query
+    each, the users and their roles inserted with one bulk insert each. The index of `df`
+    holds the row numbers in the file, used by the error report. The progress of `job` is
+    recorded in the same transaction.
+
+    Returns the created users and the per-row error report.
+    """
+    rows = len(df)
+    # Empty lines of a spreadsheet are counted but not reported
+    df = df[df.notna().any(axis=1)].copy()
+    errors = validate_user_frame(df)
+
+    # Invalid URLs are dropped instead of rejecting the row
+    for column in URL_COLUMNS:
+        df[column] = df[column].where(df[column].str.fullmatch(URL_REGEX, na=False), None)
+
+    role_names = df['roles'].dropna().map(lambda roles: [name.strip() for name in roles.split(',') if name.strip()])
+    roles = dict(Role.objects.filter(name__in={name for names in role_names for name in names}).values_list('name', 'id'))
+    for index, names in role_names.items():
+        unknown = [name for name in names if name not in roles]
+        if unknown:
+            errors.setdefault(index, {}).setdefault('roles', []).append(f"Unknown roles: {', '.join(unknown)}.")
+
+    emails = df['email'].dropna()
+    passport_ids = df['passport_id'].dropna()
+    existing = User.objects.filter(email__in=emails.tolist()) | User.objects.filter(passport_id__in=passport_ids.tolist())
+    taken_emails, taken_passport_ids = set(), set()
+    for email, passport_id in existing.values_list('email', 'passport_id'):
+        taken_emails.add(email)
+        taken_passport_ids.add(passport_id)
+    for index in emails[emails.isin(taken_emails)].index:
+        errors.setdefault(index, {}).setdefault('email', []).append("A user with this email already exists.")
+    for index in passport_ids[passport_ids.isin(taken_passport_ids)].index:
+        errors.setdefault(index, {}).setdefault('passport_id', []).append("A user with this passport ID already exists.")
+
+    valid = df.drop(index=list(errors))
+    users = []
+    user_roles = []
+    for index, record in zip(valid.index, valid.to_dict('records')):
+        names = role_names.get(index, [])
+        user = User(**{field: value for field, value in record.items() if field != 'roles' and value is not None})
+        user.first_time_login = True
+        users.append(user)
+        user_roles.extend(User.roles.through(user_id=user.id, role_id=roles[name]) for name in names)
+
+    # The initial password is the passport ID
+    for user, password in zip(users, hash_passwords([user.passport_id for user in users])):
+        user.password = password
+
+    report = [
+        {"row": index, "errors": row_errors}
+        for index, row_errors in sorted(errors.items())
+    ]
+
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        User.roles.through.objects.bulk_create(user_roles)
+        EmailOutbox.objects.enqueue_many([get_registration_email(user) for user in users])
+        if job:
+            job.record_chunk(rows, len(users), report)
+
+    return users, report
+
+
+def cell_to_text(value):
+    """
+    Return a spreadsheet cell as the text it shows, so numbers like passport IDs
+    and phone numbers are not turned into floats.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_numbered_chunks(rows, header, chunk_size):
+    """
+    Group (row number, cells) pairs into frames of `chunk_size` rows, indexed by their row number.
+    """
+    numbers, chunk = [], []
+    for number, row in rows:
+        if len(row) > len(header):
+            # Empty trailing cells are left by spreadsheets, other ones have no column
+            if any(cell not in (None, '') for cell in row[len(header):]):
+                raise ValueError(f"Row {number} has more cells than the header.")
+            row = row[:len(header)]
+        numbers.append(number)
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield pd.DataFrame(chunk, columns=header, index=numbers)
+            numbers, chunk = [], []
+    if chunk:
+        yield pd.DataFrame(chunk, columns=header, index=numbers)
+
+
+def iter_csv_records(file):
+    """
+    Yield the line number a CSV record starts on and its cells, blank lines skipped.
+    Read as CSV rather than by line, a quoted cell can span several lines.
+    """
+    reader = csv.reader(io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline=""))
+    line = 0
+    for row in reader:
+        number, line = line + 1, reader.line_num
+        if row:
+            yield number, row
+
+
+def iter_csv_chunks(file, chunk_size):
+    records = iter_csv_records(file)
+    _number, header = next(records, (None, []))
+    yield from iter_numbered_chunks(records, header, chunk_size)
+
+
+def iter_xlsx_chunks(file, chunk_size):
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [cell_to_text(cell) for cell in next(rows, [])]
+        numbered = ((number, [cell_to_text(cell) for cell in row]) for number, row in enumerate(rows, start=2))
+        yield from iter_numbered_chunks(numbered, header, chunk_size)
+    finally:
+        workbook.close()
+
+
+def skip_rows(chunks, count):
+    """
+    Skip the first `count` rows of a chunk iterator. The rows are still parsed, so
+    the skipped rows are the same as in the first run whatever the file contains.
+    """
+    for chunk in chunks:
+        if count >= len(chunk):
+            count -= len(chunk)
+            continue
+        yield chunk.iloc[count:]
+        count = 0
+
+
+def count_file_rows(job):
+    """
+    Count the data rows of the file of a user import job, without the header, or
+    return None if the spreadsheet does not record its dimensions.
+    """
+    with job.file.open("rb") as file:
+        if job.file_format == "xlsx":
+            workbook = load_workbook(file, read_only=True, data_only=True)
+            try:
+                max_row = workbook.active.max_row
+            finally:
+                workbook.close()
+            return max(max_row - 1, 0) if max_row else None
+
+        return max(sum(1 for _record in iter_csv_records(file)) - 1, 0)
+
+
+def import_user_file(job, chunk_size):
+    """
+    Import the file of a user import job chunk by chunk, without loading it whole in memory.
+    """
+    iter_chunks = iter_xlsx_chunks if job.file_format == "xlsx" else iter_csv_chunks
+    with job.file.open("rb") as file:
+        for chunk in skip_rows(iter_chunks(file, chunk_size), job.processed_rows):
+            import_user_chunk(prepare_user_frame(chunk), job=job)
+
+
+def get_import_admin(job):
+    model = apps.get_model(job.model_label)
+    try:
+        return admin.site._registry[model]
+    except KeyError:
+        raise ValueError(f"No admin is registered for {job.model_label}.")
+
+
+def get_import_result_errors(result, first_row):
+    """
+    Return the per-row error report of an import-export result, `first_row` being
+    the row number of the first row of the imported dataset in the file.
+    """
+    errors = {}
+    for number, row_errors in result.row_errors():
+        errors.setdefault(number, {}).setdefault("__all__", []).extend(str(error.error) for error in row_errors)
+    for row in result.invalid_rows:
+        for field, field_errors in row.error_dict.items():
+            errors.setdefault(row.number, {}).setdefault(field, []).extend(field_errors)
+    for error in result.base_errors:
+        errors.setdefault(1, {}).setdefault("__all__", []).append(str(error.error))
+
+    return [
+        {"row": first_row + number - 1, "errors": row_errors}
+        for number, row_errors in sorted(errors.items())
+    ]
+
+
+def import_model_file(job, chunk_size):
+    """
+    Import the file of an admin import job with the resource and format chosen in the admin.
+
+    The dataset is imported chunk by chunk, each chunk in its own transaction with the job
+    progress. Like in the admin, a chunk raising errors is rolled back as a whole and rows
+    failing validation are skipped.
+    """
+    model_admin = get_import_admin(job)
+    resource_class = model_admin.get_import_resource_classes(None)[job.resource_index]
+    input_format = import_string(job.input_format)()
+
+    with job.file.open("rb") as file:
+        data = file.read()
+    if not input_format.is_binary():
+        input_format.encoding = model_admin.from_encoding
+        data = data.decode(model_admin.from_encoding)
+    dataset = input_format.create_dataset(data)
+    if job.total_rows is None:
+        job.total_rows = len(dataset)
+        job.save(update_fields=["total_rows", "updated_at"])
+
+    for start in range(job.processed_rows, len(dataset), chunk_size):
+        chunk = tablib.Dataset(*dataset[start:start + chunk_size], headers=dataset.headers)
+        with transaction.atomic():
+            result = resource_class().import_data(chunk, dry_run=False, raise_errors=False, use_transactions=True)
+            created_rows = 0 if result.has_errors() else (
+                result.totals[RowResult.IMPORT_TYPE_NEW] + result.totals[RowResult.IMPORT_TYPE_UPDATE]
+            )
+            job.record_chunk(len(chunk), created_rows, get_import_result_errors(result, start + 2))
+
+
+def run_import_job(job, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Run an import job, the heavy part of an upload, out of the request.
+
+    Every chunk is validated and inserted in its own transaction with the job progress,
+    so a failed or interrupted job resumes after its last committed chunk when run again.
+    """
+    job.status = ImportJob.Status.RUNNING
+    job.last_error = ""
+    job.save(update_fields=["status", "last_error", "updated_at"])
+
+    try:
+        if job.kind == ImportJob.Kind.ADMIN:
+            import_model_file(job, chunk_size)
+        else:
+            if job.total_rows is None:
+                job.total_rows = count_file_rows(job)
+                job.save(update_fields=["total_rows", "updated_at"])
+            import_user_file(job, chunk_size)
+    except Exception as e:
+        job.status = ImportJob.Status.FAILED
+        job.last_error = str(e)
+        job.save(update_fields=["status", "last_error", "updated_at"])
+        raise
+
+    job.status = ImportJob.Status.COMPLETED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at", "updated_at"])
+    return job
+
+
+def requeue_stale_import_jobs():
+    """
+    Mark the running import jobs not updated for IMPORT_JOB_STALE_TIMEOUT as pending again,
+    their worker having died. They resume after their last committed chunk.
+    """
+    now = timezone.now()
+    return ImportJob.objects.filter(
+        status=ImportJob.Status.RUNNING,
+        updated_at__lt=now - IMPORT_JOB_STALE_TIMEOUT
+    ).update(status=ImportJob.Status.PENDING, updated_at=now)
+
+
+def claim_import_job():
+    """
+    Mark the oldest pending import job as running and return it, or None if there is none.
+    """
+    jobs = ImportJob.objects.filter(status=ImportJob.Status.PENDING).order_by("created_at").claim(
+        1, status=ImportJob.Status.RUNNING, updated_at=timezone.now()
+    )
+    return jobs[0] if jobs else None
+
+
+class BackgroundImportMixin:
+    """
+    Queue the imports of an ImportExportModelAdmin as import jobs instead of running them
+    in the request. The file is stored as uploaded and imported by the run_import_jobs
+    command, the job page showing its progress.
+    """
+
+    def import_action(self, request, **kwargs):
+        if not self.has_import_permission(request):
+            raise PermissionDenied
+
+        import_form = self.create_import_form(request)
+        if not (request.POST and import_form.is_valid()):
+            return super().import_action(request, **kwargs)
+
+        input_format = self.get_import_formats()[int(import_form.cleaned_data["format"])]
+        import_file = import_form.cleaned_data["import_file"]
+        job = ImportJob(
+            kind=ImportJob.Kind.ADMIN,
+            model_label=self.model._meta.label_lower,
+            resource_index=self.get_resource_index(import_form),
+            input_format=f"{input_format.__module__}.{input_format.__qualname__}",
+            created_by=request.user,
+        )
+        job.file.save(import_file.name, import_file, save=False)
+        job.save()
+
+        self.message_user(
+            request,
+            _("The import of {file} is queued as job {job}.").format(file=import_file.name, job=job.id),
+            level=messages.SUCCESS
+        )
+        return redirect("admin:identity_importjob_change", job.id)
@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Length
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from identity.models import AccessToken
+
+
+# Length of the SHA-256 hex digests stored by AccessToken.hash_token
+HASHED_TOKEN_LENGTH = 64
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the expired access tokens and outstanding refresh tokens (with their blacklist entries) "
+        "in bounded batches, and replace the raw access tokens still stored by their hash. "
+        "Meant to be run periodically, e.g. daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows deleted or hashed per transaction.",
+        )
+        parser.add_argument(
+            "--skip-hashing",
+            action="store_true",
+            help="Only delete the expired tokens, without hashing the raw access tokens.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        now = timezone.now()
+        reclaimed = {}
+
+        reclaimed["expired access tokens"] = self.purge(
+            AccessToken.objects.filter(expires_at__lt=now), batch_size
+        )
+        # The blacklist entries of the outstanding tokens are deleted with them
+        reclaimed["expired refresh tokens"] = self.purge(
+            OutstandingToken.objects.filter(expires_at__lt=now), batch_size
+        )
+        if not options["skip_hashing"]:
+            reclaimed["hashed access tokens"] = self.hash_tokens(batch_size)
+
+        for name, (rows, size) in reclaimed.items():
+            self.stdout.write(f"{name.capitalize()}: {rows} rows, {size} bytes of token text reclaimed.")
+
+        total_rows = sum(rows for rows, size in reclaimed.values())
+        total_size = sum(size for rows, size in reclaimed.values())
+        self.stdout.write(self.style.SUCCESS(f"Compacted {total_rows} rows, reclaiming {total_size} bytes."))
+
+    def purge(self, queryset, batch_size):
+        """
+        Delete the rows of `queryset` in batches of `batch_size`, so no transaction holds
+        the table for long. Returns the number of deleted rows, including the cascaded
+        ones, and the size of the token text deleted.
+        """
+        rows = size = 0
+        while True:
+            with transaction.atomic():
+                batch = queryset.model.objects.filter(
+                    pk__in=list(queryset.values_list("pk", flat=True)[:batch_size])
+                )
+                batch_text_size = batch.aggregate(size=Sum(Length("token")))["size"]
+                if batch_text_size is None:
+                    return rows, size
+                deleted, _ = batch.delete()
+            rows += deleted
+            size += batch_text_size
+
+    def hash_tokens(self, batch_size):
+        """
+        Replace the raw access tokens saved before the tokens were hashed by their hash.
+        Returns the number of hashed rows and the size of the token text saved.
+        """
+        raw_tokens = AccessToken.objects.annotate(token_length=Length("token")).filter(
+            token_length__gt=HASHED_TOKEN_LENGTH
+        )
+        rows = size = 0
+        while True:
+            with transaction.atomic():
+                batch = list(raw_tokens.select_for_update().only("pk", "token")[:batch_size])
+                if not batch:
+                    return rows, size
+                for access_token in batch:
+                    size += len(access_token.token) - HASHED_TOKEN_LENGTH
+                    access_token.token = AccessToken.hash_token(access_token.token)
+                AccessToken.objects.bulk_update(batch, ["token"])
+            rows += len(batch)
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from identity.imports import IMPORT_CHUNK_SIZE, claim_import_job, requeue_stale_import_jobs, run_import_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the pending import jobs of the bulk user upload and of the admin imports, "
+        "recording their row progress chunk by chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help="Number of rows imported per transaction.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for pending jobs instead of exiting once none is left.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between two polls with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        while True:
+            self.drain(options["chunk_size"])
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def drain(self, chunk_size):
+        """
+        Run the pending jobs one by one, until none is left. Jobs claimed by another
+        worker are skipped, so several workers can run side by side. Jobs left running
+        by a dead worker are queued again first.
+        """
+        requeued = requeue_stale_import_jobs()
+        if requeued:
+            self.stdout.write(f"Queued {requeued} abandoned import jobs again.")
+        while job := claim_import_job():
+            try:
+                run_import_job(job, chunk_size)
+            except Exception as e:
+                # The job is marked as failed, it can be retried from the admin
+                self.stderr.write(f"Import job {job.id} failed: {e}")
+            else:
+                self.stdout.write(
+                    f"Import job {job.id} completed: {job.created_rows} rows imported, {job.failed_rows} failed."
+                )
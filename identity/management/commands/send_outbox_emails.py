@@ -0,0 +1,138 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from identity.models import EmailOutbox
+
+
+# Delay before the first retry of a failed email, doubled after every attempt
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=1)
+# Time a claimed email is reserved for the worker sending it
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the queued emails of the outbox in batches over a single SMTP connection, "
+        "retrying the failed ones with an exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of emails sent per batch.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="Number of attempts after which an email is marked as failed.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting once it is drained.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between two polls with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["max_attempts"] < 1:
+            raise CommandError("--batch-size and --max-attempts must be positive.")
+
+        while True:
+            sent, failed = self.drain(options["batch_size"], options["max_attempts"])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed attempts.")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def drain(self, batch_size, max_attempts):
+        """
+        Send the due emails batch by batch over one connection, until none is due.
+        Returns the number of sent emails and failed attempts.
+        """
+        total_sent = total_failed = 0
+        connection = get_connection(fail_silently=False)
+        try:
+            while True:
+                batch = self.claim_batch(batch_size)
+                if not batch:
+                    return total_sent, total_failed
+                sent, failed, connection_error = self.send_batch(connection, batch, max_attempts)
+                total_sent += sent
+                total_failed += failed
+                if connection_error:
+                    # The connection itself is failing, retry after the backoff
+                    return total_sent, total_failed
+        finally:
+            connection.close()
+
+    def claim_batch(self, batch_size):
+        """
+        Claim a batch of due emails, or return an empty list if none is due. Their next
+        attempt is pushed CLAIM_TIMEOUT away, so they are retried if this worker dies
+        before sending them.
+        """
+        now = timezone.now()
+        return EmailOutbox.objects.due().order_by("next_attempt_at").claim(
+            batch_size, next_attempt_at=now + CLAIM_TIMEOUT, updated_at=now
+        )
+
+    def send_batch(self, connection, batch, max_attempts):
+        """
+        Send a batch of emails, rescheduling the failed ones. Returns the number of sent
+        emails and failed attempts, and the error raised opening the connection if any.
+        """
+        now = timezone.now()
+        sent = []
+        failed = []
+
+        try:
+            connection.open()
+        except Exception as e:
+            error = e
+        else:
+            error = None
+
+        for email in batch:
+            if error is None:
+                try:
+                    # Sent one by one over the open connection, to know which ones failed
+                    connection.send_messages([email.to_message(connection)])
+                except Exception as e:
+                    email.last_error = str(e)
+                else:
+                    email.status = EmailOutbox.Status.SENT
+                    email.sent_at = now
+                    email.last_error = ""
+                    sent.append(email)
+                    continue
+            else:
+                email.last_error = str(error)
+
+            email.attempts += 1
+            if email.attempts >= max_attempts:
+                email.status = EmailOutbox.Status.FAILED
+            else:
+                email.next_attempt_at = now + min(RETRY_BASE_DELAY * 2 ** (email.attempts - 1), RETRY_MAX_DELAY)
+            failed.append(email)
+
+        for email in sent + failed:
+            email.updated_at = now
+        EmailOutbox.objects.bulk_update(
+            sent + failed,
+            ["status", "attempts", "next_attempt_at", "sent_at", "last_error", "updated_at"]
+        )
+        return len(sent), len(failed), error
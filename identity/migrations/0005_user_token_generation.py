@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identity', '0004_remove_user_phone_number_user_phone_number_1_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_generation',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Incremented on every login, the tokens issued before are revoked in the token generation mode.', verbose_name='Token generation'),
+        ),
+    ]
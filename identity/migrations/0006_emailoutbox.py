@@ -0,0 +1,38 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:21
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identity', '0005_user_token_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('subject', models.CharField(max_length=255, verbose_name='Subject')),
+                ('body', models.TextField(help_text='The plain text version of the email.', verbose_name='Body')),
+                ('html_body', models.TextField(blank=True, help_text='The HTML version of the email, sent as an alternative of the plain text body.', verbose_name='HTML body')),
+                ('from_email', models.CharField(max_length=255, verbose_name='From email')),
+                ('to', models.JSONField(help_text='The list of the recipient email addresses.', verbose_name='To')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='The email is not sent before this time, pushed back after every failed attempt.', verbose_name='Next attempt at')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Sent at')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last error')),
+            ],
+            options={
+                'verbose_name': 'Email outbox',
+                'verbose_name_plural': 'Email outbox',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:27
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identity', '0006_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('file', models.FileField(help_text='The uploaded CSV or XLSX file of the users.', upload_to='imports/users/', verbose_name='File')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='Status')),
+                ('processed_rows', models.PositiveIntegerField(default=0, help_text='The number of rows of the file committed so far, the import resumes after them.', verbose_name='Processed rows')),
+                ('created_rows', models.PositiveIntegerField(default=0, verbose_name='Created rows')),
+                ('failed_rows', models.PositiveIntegerField(default=0, verbose_name='Failed rows')),
+                ('errors', models.JSONField(blank=True, default=list, help_text='The errors of the rows that could not be imported, by row number.', verbose_name='Errors')),
+                ('last_error', models.TextField(blank=True, help_text='The error that stopped the import, if it failed.', verbose_name='Last error')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished at')),
+            ],
+            options={
+                'verbose_name': 'User import job',
+                'verbose_name_plural': 'User import jobs',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identity', '0007_userimportjob'),
+    ]
+
+    operations = [
+        migrations.RenameModel(
+            old_name='UserImportJob',
+            new_name='ImportJob',
+        ),
+        migrations.AlterModelOptions(
+            name='importjob',
+            options={'ordering': ('-created_at',), 'verbose_name': 'Import job', 'verbose_name_plural': 'Import jobs'},
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='kind',
+            field=models.CharField(choices=[('users', 'Users'), ('admin', 'Admin')], default='users', help_text='Users for the bulk user upload, admin for the import of a model in the admin.', max_length=10, verbose_name='Kind'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='model_label',
+            field=models.CharField(blank=True, help_text='The app label and name of the model imported by an admin import, e.g. group.group.', max_length=100, verbose_name='Model'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='resource_index',
+            field=models.PositiveSmallIntegerField(default=0, help_text='The index of the import resource chosen in the admin.', verbose_name='Resource index'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='input_format',
+            field=models.CharField(blank=True, help_text='The dotted path of the import format chosen in the admin.', max_length=255, verbose_name='Input format'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Created by'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='total_rows',
+            field=models.PositiveIntegerField(blank=True, help_text='The number of rows of the file, counted when the import starts.', null=True, verbose_name='Total rows'),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='file',
+            field=models.FileField(help_text='The uploaded file to import.', upload_to='imports/', verbose_name='File'),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='created_rows',
+            field=models.PositiveIntegerField(default=0, help_text='The number of rows created, or updated by an admin import.', verbose_name='Created rows'),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['status', 'created_at'], name='import_job_status_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identity', '0008_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='claim_token',
+            field=models.UUIDField(blank=True, editable=False, help_text='The token of the last send_outbox_emails batch the email was claimed by.', null=True, verbose_name='Claim token'),
+        ),
+    ]
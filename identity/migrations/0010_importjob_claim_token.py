@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('identity', '0009_emailoutbox_claim_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='claim_token',
+            field=models.UUIDField(blank=True, editable=False, help_text='The token of the last run_import_jobs worker the job was claimed by.', null=True, verbose_name='Claim token'),
+        ),
+    ]
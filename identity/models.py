@@ -1,6 +1,9 @@
+import hashlib
 import uuid
+from django.conf import settings
 from django.contrib.auth import get_backends
 from django.contrib.auth.models import AbstractBaseUser, Permission
+from django.core.mail import EmailMultiAlternatives
 from django.core.validators import RegexValidator
 from django.db import models
 from django.utils import timezone
@@ -9,6 +12,7 @@ from django.utils.translation import gettext_lazy as _
 
 from identity.managers import CustomUserManager
 from services.abstract_models import TimeStampedModel
+from services.querysets import ClaimQuerySet
 
 
 def _user_get_permissions(user, obj, from_name):
@@ -20,6 +24,20 @@ def _user_get_permissions(user, obj, from_name):
     return permissions
 
 
+def _user_has_perm(user, perm, obj):
+    for backend in get_backends():
+        if hasattr(backend, "has_perm") and backend.has_perm(user, perm, obj):
+            return True
+    return False
+
+
+def _user_has_module_perms(user, app_label):
+    for backend in get_backends():
+        if hasattr(backend, "has_module_perms") and backend.has_module_perms(user, app_label):
+            return True
+    return False
+
+
 class Role(TimeStampedModel):
     name = models.CharField(
         verbose_name=_("Name"),
@@ -207,6 +225,12 @@ class User(AbstractBaseUser):
         help_text=_("Designates whether this user has all permissions.")
     )
     date_joined = models.DateTimeField(_("date joined"), default=timezone.now)
+    token_generation = models.PositiveIntegerField(
+        verbose_name=_("Token generation"),
+        default=0,
+        editable=False,
+        help_text=_("Incremented on every login, the tokens issued before are revoked in the token generation mode.")
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
@@ -214,12 +238,25 @@ class User(AbstractBaseUser):
     objects = CustomUserManager()
 
     def has_perm(self, perm, obj=None):
-        """Return True if the user is a superuser, otherwise False."""
-        return self.is_superuser
+        """
+        Return True if the user has the permission, an active superuser having them all.
+        Query all available auth backends, the roles of the user included.
+        """
+        if self.is_active and self.is_superuser:
+            return True
+        return _user_has_perm(self, perm, obj)
 
     def has_module_perms(self, app_label):
-        """Return True if the user has permissions for the app."""
-        return self.is_superuser
+        """Return True if the user has any permission in the app."""
+        if self.is_active and self.is_superuser:
+            return True
+        return _user_has_module_perms(self, app_label)
+
+    def get_all_permissions(self, obj=None):
+        """
+        Return a set of permission strings that this user has from all the auth backends.
+        """
+        return _user_get_permissions(self, obj, "all")
 
     class Meta:
         verbose_name = _("User")
@@ -260,6 +297,8 @@ class AccessToken(models.Model):
         related_name="access_tokens",
         verbose_name=_("User")
     )
+    # SHA-256 digest of the token, see hash_token. Rows saved before may hold the raw token
+    # until the purge_expired_tokens command hashes them.
     token = models.TextField(
         verbose_name=_("Token"),
     )
@@ -274,6 +313,13 @@ class AccessToken(models.Model):
         default=True
     )
 
+    @staticmethod
+    def hash_token(token):
+        """
+        Return the SHA-256 hex digest stored instead of the raw token text.
+        """
+        return hashlib.sha256(token.encode()).hexdigest()
+
     class Meta:
         app_label = "token_blacklist"
         verbose_name = _("Access token")
@@ -282,3 +328,251 @@ class AccessToken(models.Model):
 
     def __str__(self):
         return f"{self.user.email} - {self.jti}"
+
+
+class EmailOutboxQuerySet(ClaimQuerySet):
+
+    def build(self, subject, body, to, html_body="", from_email=None):
+        """
+        Return an unsaved outbox email, see enqueue.
+        """
+        return self.model(
+            subject=subject,
+            body=body,
+            html_body=html_body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(to),
+        )
+
+    def enqueue(self, subject, body, to, html_body="", from_email=None):
+        """
+        Queue an email to be sent by the send_outbox_emails command, instead of
+        sending it over SMTP during the request. Queued in a transaction, the email
+        is only sent if the transaction is committed.
+        """
+        email = self.build(subject, body, to, html_body=html_body, from_email=from_email)
+        email.save(using=self.db)
+        return email
+
+    def enqueue_many(self, emails):
+        """
+        Queue several emails with a single insert, each given as the keyword arguments of enqueue.
+        """
+        return self.bulk_create([self.build(**email) for email in emails])
+
+    def due(self):
+        return self.filter(status=EmailOutbox.Status.PENDING, next_attempt_at__lte=timezone.now())
+
+
+class EmailOutbox(TimeStampedModel):
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        SENT = "sent", _("Sent")
+        FAILED = "failed", _("Failed")
+
+    subject = models.CharField(
+        verbose_name=_("Subject"),
+        max_length=255
+    )
+    body = models.TextField(
+        verbose_name=_("Body"),
+        help_text=_("The plain text version of the email.")
+    )
+    html_body = models.TextField(
+        verbose_name=_("HTML body"),
+        blank=True,
+        help_text=_("The HTML version of the email, sent as an alternative of the plain text body.")
+    )
+    from_email = models.CharField(
+        verbose_name=_("From email"),
+        max_length=255
+    )
+    to = models.JSONField(
+        verbose_name=_("To"),
+        help_text=_("The list of the recipient email addresses.")
+    )
+    status = models.CharField(
+        verbose_name=_("Status"),
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name=_("Attempts"),
+        default=0
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name=_("Next attempt at"),
+        default=timezone.now,
+        help_text=_("The email is not sent before this time, pushed back after every failed attempt.")
+    )
+    sent_at = models.DateTimeField(
+        verbose_name=_("Sent at"),
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(
+        verbose_name=_("Last error"),
+        blank=True
+    )
+    claim_token = models.UUIDField(
+        verbose_name=_("Claim token"),
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_("The token of the last send_outbox_emails batch the email was claimed by.")
+    )
+
+    objects = EmailOutboxQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Email outbox")
+        verbose_name_plural = _("Email outbox")
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="email_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} - {', '.join(self.to)}"
+
+    def to_message(self, connection=None):
+        message = EmailMultiAlternatives(self.subject, self.body, self.from_email, self.to, connection=connection)
+        if self.html_body:
+            message.attach_alternative(self.html_body, "text/html")
+        return message
+
+
+class ImportJob(TimeStampedModel):
+    class Kind(models.TextChoices):
+        USERS = "users", _("Users")
+        ADMIN = "admin", _("Admin")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        COMPLETED = "completed", _("Completed")
+        FAILED = "failed", _("Failed")
+
+    kind = models.CharField(
+        verbose_name=_("Kind"),
+        max_length=10,
+        choices=Kind.choices,
+        default=Kind.USERS,
+        help_text=_("Users for the bulk user upload, admin for the import of a model in the admin.")
+    )
+    model_label = models.CharField(
+        verbose_name=_("Model"),
+        max_length=100,
+        blank=True,
+        help_text=_("The app label and name of the model imported by an admin import, e.g. group.group.")
+    )
+    resource_index = models.PositiveSmallIntegerField(
+        verbose_name=_("Resource index"),
+        default=0,
+        help_text=_("The index of the import resource chosen in the admin.")
+    )
+    input_format = models.CharField(
+        verbose_name=_("Input format"),
+        max_length=255,
+        blank=True,
+        help_text=_("The dotted path of the import format chosen in the admin.")
+    )
+    file = models.FileField(
+        verbose_name=_("File"),
+        upload_to="imports/",
+        help_text=_("The uploaded file to import.")
+    )
+    created_by = models.ForeignKey(
+        User,
+        verbose_name=_("Created by"),
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="import_jobs"
+    )
+    status = models.CharField(
+        verbose_name=_("Status"),
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    total_rows = models.PositiveIntegerField(
+        verbose_name=_("Total rows"),
+        null=True,
+        blank=True,
+        help_text=_("The number of rows of the file, counted when the import starts.")
+    )
+    processed_rows = models.PositiveIntegerField(
+        verbose_name=_("Processed rows"),
+        default=0,
+        help_text=_("The number of rows of the file committed so far, the import resumes after them.")
+    )
+    created_rows = models.PositiveIntegerField(
+        verbose_name=_("Created rows"),
+        default=0,
+        help_text=_("The number of rows created, or updated by an admin import.")
+    )
+    failed_rows = models.PositiveIntegerField(
+        verbose_name=_("Failed rows"),
+        default=0
+    )
+    errors = models.JSONField(
+        verbose_name=_("Errors"),
+        default=list,
+        blank=True,
+        help_text=_("The errors of the rows that could not be imported, by row number.")
+    )
+    last_error = models.TextField(
+        verbose_name=_("Last error"),
+        blank=True,
+        help_text=_("The error that stopped the import, if it failed.")
+    )
+    finished_at = models.DateTimeField(
+        verbose_name=_("Finished at"),
+        null=True,
+        blank=True
+    )
+    claim_token = models.UUIDField(
+        verbose_name=_("Claim token"),
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_("The token of the last run_import_jobs worker the job was claimed by.")
+    )
+
+    objects = ClaimQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Import job")
+        verbose_name_plural = _("Import jobs")
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="import_job_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.file.name} - {self.get_status_display()}"
+
+    @property
+    def file_format(self):
+        return "xlsx" if self.file.name.endswith(".xlsx") else "csv"
+
+    @property
+    def progress(self):
+        """
+        Return the percentage of the rows processed, or None while they are not counted.
+        """
+        if not self.total_rows:
+            return None if self.total_rows is None else 100
+        return round(self.processed_rows * 100 / self.total_rows, 1)
+
+    def record_chunk(self, rows, created_rows, errors):
+        """
+        Persist the progress of an imported chunk, in the transaction of its inserts
+        so a resumed import neither skips nor repeats rows.
+        """
+        self.processed_rows += rows
+        self.created_rows += created_rows
+        self.failed_rows += len(errors)
+        self.errors.extend(errors)
+        self.save(update_fields=["processed_rows", "created_rows", "failed_rows", "errors", "updated_at"])
@@ -2,14 +2,21 @@ from rest_framework import serializers
 from django.contrib.auth.models import Permission
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from group.models import Group, UserGroup
 from identity.models import (
+    ImportJob,
     User,
     Role,
     AccessToken as AccessTokenModel
 )
+from identity.authentication import TOKEN_GENERATION_CLAIM
+from identity.token_cache import get_token_state_cache, uses_token_generation
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 from rest_framework_simplejwt.utils import datetime_from_epoch
@@ -178,6 +185,18 @@ class UserBulkUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
 
 
+class ImportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = ImportJob
+        fields = (
+            'id', 'kind', 'model_label', 'status', 'progress', 'total_rows', 'processed_rows',
+            'created_rows', 'failed_rows', 'errors', 'last_error', 'created_at', 'updated_at', 'finished_at'
+        )
+        read_only_fields = fields
+
+
 class UserJwtSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -204,6 +223,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             for field in UserJwtSerializer.Meta.fields
             if hasattr(user, field) and field != "id"
         }
+
+        if uses_token_generation():
+            # Revoke the tokens issued before, the claim is copied to the access tokens
+            User.objects.filter(pk=user.pk).update(token_generation=F("token_generation") + 1)
+            user.refresh_from_db(fields=["token_generation"])
+            token[TOKEN_GENERATION_CLAIM] = user.token_generation
         return token
 
     def validate(self, attrs):
@@ -212,10 +237,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
         # Blacklist old refresh tokens
         self._blacklist_old_refresh_tokens(user, data.get("refresh"))
-        # Deactivate old access tokens (mark them as inactive)
-        self._deactivate_old_access_tokens(user)
-        # Save the new access token in the database
-        self._save_new_access_token(user, data.get("access"))
+        # The token generation mode revokes the old access tokens without storing them
+        if not uses_token_generation():
+            # Deactivate old access tokens (mark them as inactive)
+            self._deactivate_old_access_tokens(user)
+            # Save the new access token in the database
+            self._save_new_access_token(user, data.get("access"))
 
         # Add the user information to the response data
         data["user"] = UserJwtSerializer(user).data
@@ -226,13 +253,17 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             try:
                 current_refresh_jti = RefreshToken(
                     current_refresh_token).get("jti")
-                # Find all outstanding tokens for the user, excluding the current one
-                previous_tokens = OutstandingToken.objects.filter(
-                    user=user).exclude(jti=current_refresh_jti)
-                # Bulk create blacklisted tokens for all previous tokens
+                # Find the outstanding tokens of the user that can still be used, excluding the current one.
+                # Every login blacklists the previous ones, so these are only the few issued since the last login.
+                previous_token_ids = OutstandingToken.objects.filter(
+                    user=user,
+                    expires_at__gt=timezone.now(),
+                    blacklistedtoken__isnull=True
+                ).exclude(jti=current_refresh_jti).values_list("id", flat=True)
+                # Bulk create blacklisted tokens for the previous tokens
                 BlacklistedToken.objects.bulk_create(
-                    [BlacklistedToken(token=token)
-                     for token in previous_tokens],
+                    [BlacklistedToken(token_id=token_id)
+                     for token_id in previous_token_ids],
                     ignore_conflicts=True
                 )
             except Exception as e:
@@ -241,6 +272,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def _deactivate_old_access_tokens(self, user):
         AccessTokenModel.objects.filter(
             user=user, is_active=True).update(is_active=False)
+        # Stop trusting the cached state of the deactivated tokens once committed
+        transaction.on_commit(lambda: get_token_state_cache().bump_version(user.pk))
 
     def _save_new_access_token(self, user, current_access_token):
         if current_access_token:
@@ -251,7 +284,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
                 AccessTokenModel.objects.create(
                     user=user,
                     jti=access_token["jti"],
-                    token=current_access_token,
+                    token=AccessTokenModel.hash_token(current_access_token),
                     created_at=datetime_from_epoch(access_token["iat"]),
                     expires_at=datetime_from_epoch(access_token["exp"]),
                 )
@@ -261,27 +294,43 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 class CustomTokenRefreshSerializer(TokenRefreshSerializer):
     def validate(self, attrs):
-        data = super().validate(attrs)
+        """
+        Same as TokenRefreshSerializer.validate, keeping the new access token object
+        so it can be saved from its claims without parsing it again.
+        """
+        refresh = self.token_class(attrs["refresh"])
+        access_token = refresh.access_token
+
+        data = {"access": str(access_token)}
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                # Blacklist the given refresh token
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data["refresh"] = str(refresh)
+
         # Save the new access token in the database
-        self._save_new_access_token(data.get("access"))
+        if not uses_token_generation():
+            self._save_new_access_token(access_token, data["access"])
         return data
 
-    def _save_new_access_token(self, new_access_token):
-        if new_access_token:
-            try:
-                # Parse the new access token
-                access_token = AccessToken(new_access_token)
-                user = User.objects.get(id=access_token["user_id"])
-                # Create a new record in the AccessToken model
-                AccessTokenModel.objects.create(
-                    user=user,
-                    jti=access_token["jti"],
-                    token=new_access_token,
-                    created_at=datetime_from_epoch(access_token["iat"]),
-                    expires_at=datetime_from_epoch(access_token["exp"]),
-                )
-            except Exception as e:
-                raise ValueError(f"Error saving new access token: {e}")
+    def _save_new_access_token(self, access_token, new_access_token):
+        try:
+            # Create a new record in the AccessToken model, the user is only needed by its id
+            AccessTokenModel.objects.create(
+                user_id=access_token[jwt_settings.USER_ID_CLAIM],
+                jti=access_token["jti"],
+                token=AccessTokenModel.hash_token(new_access_token),
+                created_at=datetime_from_epoch(access_token["iat"]),
+                expires_at=datetime_from_epoch(access_token["exp"]),
+            )
+        except Exception as e:
+            raise ValueError(f"Error saving new access token: {e}")
 
 
 class TokenObtainPairResponseSerializer(serializers.Serializer):
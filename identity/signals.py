@@ -0,0 +1,52 @@
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+from .backends import get_role_permission_cache, get_role_permissions_cache_key, get_user_roles_cache_key
+from .models import Role, User
+
+
+def get_changed_ids(instance, reverse, action, pk_set, related_name):
+    """
+    Return the ids of the instances of the forward side of a many-to-many relation
+    whose related objects changed. For a reverse clear, they are only known before it.
+    """
+    if not reverse:
+        return [instance.pk]
+    if action == "pre_clear":
+        return list(getattr(instance, related_name).values_list("pk", flat=True))
+    return pk_set or []
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def invalidate_role_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop the cached permissions of the roles whose permissions changed.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear", "post_clear"):
+        return
+    cache = get_role_permission_cache()
+    if cache is None:
+        return
+    role_ids = get_changed_ids(instance, reverse, action, pk_set, "role_set")
+    cache.delete_many([get_role_permissions_cache_key(role_id) for role_id in role_ids])
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+def invalidate_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop the cached role ids of the users whose roles changed.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear", "post_clear"):
+        return
+    cache = get_role_permission_cache()
+    if cache is None:
+        return
+    user_ids = get_changed_ids(instance, reverse, action, pk_set, "users")
+    cache.delete_many([get_user_roles_cache_key(user_id) for user_id in user_ids])
+
+
+@receiver(post_delete, sender=Role)
+def invalidate_deleted_role(sender, instance, **kwargs):
+    cache = get_role_permission_cache()
+    if cache is not None:
+        cache.delete(get_role_permissions_cache_key(instance.pk))
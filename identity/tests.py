@@ -1,3 +1,106 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from identity.imports import claim_import_job
+from identity.models import ImportJob, Role, User
+from services.querysets import ClaimQuerySet
+
+
+class RolePermissionTests(TestCase):
+    """
+    The permissions of a user come from their roles, through the auth backends. The
+    default local memory cache is not shared, so nothing outlives the user object.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(email="user@example.com")
+        self.role = Role.objects.create(name="Accountant")
+        self.role.permissions.add(Permission.objects.get(codename="view_payment"))
+        self.user.roles.add(self.role)
+
+    def get_user(self):
+        # A fresh user object, like the one of a new request
+        return User.objects.get(pk=self.user.pk)
+
+    def test_role_permissions(self):
+        user = self.get_user()
+        self.assertTrue(user.has_perm("payment.view_payment"))
+        self.assertFalse(user.has_perm("payment.change_payment"))
+        self.assertTrue(user.has_module_perms("payment"))
+        self.assertEqual(user.get_all_permissions(), {"payment.view_payment"})
+
+    def test_memoized_per_user_object(self):
+        user = self.get_user()
+        user.has_perm("payment.view_payment")
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("payment.view_payment"))
+
+    def test_role_permission_removed(self):
+        self.assertTrue(self.get_user().has_perm("payment.view_payment"))
+        self.role.permissions.clear()
+        self.assertFalse(self.get_user().has_perm("payment.view_payment"))
+
+
+@override_settings(CACHES={
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": tempfile.mkdtemp(),
+    }
+})
+class SharedRolePermissionCacheTests(RolePermissionTests):
+    """
+    With a shared cache, the role permissions cost no query once cached, and the
+    changes of the roles are invalidated.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_cached(self):
+        self.get_user().has_perm("payment.view_payment")
+        user = self.get_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("payment.view_payment"))
+
+    def test_user_role_removed(self):
+        self.assertTrue(self.get_user().has_perm("payment.view_payment"))
+        self.user.roles.remove(self.role)
+        self.assertFalse(self.get_user().has_perm("payment.view_payment"))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ClaimImportJobTests(TestCase):
+    """
+    A pending import job is claimed by a single worker.
+    """
+
+    def setUp(self):
+        self.jobs = []
+        for name in ("first.csv", "second.csv"):
+            job = ImportJob()
+            job.file.save(name, ContentFile(b"email"))
+            self.jobs.append(job)
+
+    def test_claimed_once(self):
+        self.assertEqual(claim_import_job(), self.jobs[0])
+        self.assertEqual(claim_import_job(), self.jobs[1])
+        self.assertIsNone(claim_import_job())
+        self.assertEqual(ImportJob.objects.filter(status=ImportJob.Status.RUNNING).count(), 2)
+
+    def test_lost_race(self):
+        values_list = ClaimQuerySet.values_list
+
+        def pick_then_lose(queryset, *args, **kwargs):
+            picked = values_list(queryset, *args, **kwargs)
+            # Another worker claims the first job between the pick and the update
+            ImportJob.objects.filter(pk=self.jobs[0].pk).update(status=ImportJob.Status.RUNNING)
+            return picked
+
+        with mock.patch.object(ClaimQuerySet, "values_list", pick_then_lose):
+            self.assertEqual(claim_import_job(), self.jobs[1])
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+DEFAULTS = {
+    "BACKEND": "identity.token_cache.LocalMemoryTokenStateBackend",
+    # Seconds a validated token is trusted without checking the database again
+    "TTL": 30,
+    # Maximum number of tokens kept by the local memory backend
+    "MAX_SIZE": 10000,
+    # Cache used by the Django cache backend
+    "CACHE_ALIAS": "default",
+}
+
+
+class BaseTokenStateBackend:
+    """
+    Remembers the access tokens recently found active in the database.
+
+    Every user has a revocation version, bumped whenever their tokens are deactivated.
+    A remembered token is only trusted while the version of its user is unchanged and
+    its TTL is not over, so a revocation takes effect within TTL seconds at worst.
+    """
+
+    def __init__(self, options):
+        self.ttl = options["TTL"]
+
+    def is_active(self, jti, user_id):
+        """
+        Return True if the token is known to be active, False if it has to be checked.
+        """
+        raise NotImplementedError
+
+    def get_version(self, user_id):
+        """
+        Return the current revocation version of the user.
+        """
+        raise NotImplementedError
+
+    def remember(self, jti, version):
+        """
+        Remember the token as active for a revocation version of its user, read
+        before checking the token so a revocation happening meanwhile is not missed.
+        """
+        raise NotImplementedError
+
+    def bump_version(self, user_id):
+        """
+        Invalidate every remembered token of the user.
+        """
+        raise NotImplementedError
+
+
+class LocalMemoryTokenStateBackend(BaseTokenStateBackend):
+    """
+    Keeps the tokens in a per-process LRU. A version bump is only seen by the process
+    it happens in, so other workers rely on the TTL to notice the revocation.
+    """
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.max_size = options["MAX_SIZE"]
+        self._tokens = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def is_active(self, jti, user_id):
+        with self._lock:
+            entry = self._tokens.get(jti)
+            if entry is None:
+                return False
+
+            version, expires_at = entry
+            if expires_at <= time.monotonic() or version != self._versions.get(str(user_id), 0):
+                del self._tokens[jti]
+                return False
+
+            self._tokens.move_to_end(jti)
+            return True
+
+    def get_version(self, user_id):
+        return self._versions.get(str(user_id), 0)
+
+    def remember(self, jti, version):
+        with self._lock:
+            self._tokens[jti] = (version, time.monotonic() + self.ttl)
+            self._tokens.move_to_end(jti)
+            while len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+
+    def bump_version(self, user_id):
+        with self._lock:
+            # The user id is a UUID on the model and a string in the token claims
+            self._versions[str(user_id)] = self._versions.get(str(user_id), 0) + 1
+
+
+class DjangoCacheTokenStateBackend(BaseTokenStateBackend):
+    """
+    Keeps the tokens and the revocation versions in a Django cache shared by all the
+    workers, so a revocation takes effect immediately everywhere.
+    """
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.cache = caches[options["CACHE_ALIAS"]]
+
+    def _token_key(self, jti):
+        return f"identity:access_token:{jti}"
+
+    def _version_key(self, user_id):
+        return f"identity:access_token_version:{user_id}"
+
+    def is_active(self, jti, user_id):
+        token_key, version_key = self._token_key(jti), self._version_key(user_id)
+        values = self.cache.get_many([token_key, version_key])
+        return token_key in values and values[token_key] == values.get(version_key, 0)
+
+    def get_version(self, user_id):
+        return self.cache.get(self._version_key(user_id), 0)
+
+    def remember(self, jti, version):
+        self.cache.set(self._token_key(jti), version, self.ttl)
+
+    def bump_version(self, user_id):
+        version_key = self._version_key(user_id)
+        try:
+            self.cache.incr(version_key)
+        except ValueError:
+            # Tokens remembered before the version existed were remembered for version 0
+            self.cache.set(version_key, 1, None)
+
+
+def uses_token_generation():
+    """
+    Return True if the access tokens are revoked by the token generation of their user,
+    instead of by the AccessToken rows, see the ACCESS_TOKEN_REVOCATION_MODE setting.
+    """
+    return getattr(settings, "ACCESS_TOKEN_REVOCATION_MODE", "token") == "generation"
+
+
+@lru_cache(maxsize=None)
+def get_token_state_cache():
+    """
+    Return the token state backend configured by the ACCESS_TOKEN_STATE_CACHE setting.
+    """
+    options = {**DEFAULTS, **getattr(settings, "ACCESS_TOKEN_STATE_CACHE", {})}
+    return import_string(options["BACKEND"])(options)
+
+
+@receiver(setting_changed)
+def reset_token_state_cache(setting, **kwargs):
+    if setting == "ACCESS_TOKEN_STATE_CACHE":
+        get_token_state_cache.cache_clear()
@@ -3,6 +3,7 @@ from identity.views import (
     ChangePasswordView,
     CustomTokenObtainPairView,
     CustomTokenRefreshView,
+    ImportJobDetailView,
     PasswordResetRequestView,
     ResetPasswordView,
     UserBulkUploadView,
@@ -27,4 +28,5 @@ urlpatterns = [
     path('reset-password/<uidb64>/<token>/',
          ResetPasswordView.as_view(), name='password_reset'),
     path('bulk-create/', UserBulkUploadView.as_view(), name='user-bulk-upload'),
+    path('import-jobs/<uuid:pk>/', ImportJobDetailView.as_view(), name='import-job-detail'),
 ]
@@ -1,10 +1,12 @@
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from django.template.loader import render_to_string
 
-def send_registration_email(user):
+from identity.models import EmailOutbox
+
+def get_registration_email(user):
     """
-    Send an email to the user after successful registration with both HTML and plain text.
+    Build the email sent to the user after successful registration, with both HTML and plain text,
+    as the keyword arguments of EmailOutbox.objects.enqueue.
     """
     subject = "Welcome! Complete your registration"
     
@@ -31,16 +33,17 @@ def send_registration_email(user):
         'password': user.passport_id
     })
     
-    # Create the email object
-    email = EmailMultiAlternatives(
-        subject,
-        text_content,
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email]
-    )
-    
-    # Attach the HTML version
-    email.attach_alternative(html_content, "text/html")
-    
-    # Send the email
-    email.send(fail_silently=False)
\ No newline at end of file
+    return {
+        "subject": subject,
+        "body": text_content,
+        "html_body": html_content,
+        "from_email": settings.DEFAULT_FROM_EMAIL,
+        "to": [user.email],
+    }
+
+
+def send_registration_email(user):
+    """
+    Queue the registration email of the user, it is sent by the send_outbox_emails command.
+    """
+    EmailOutbox.objects.enqueue(**get_registration_email(user))
@@ -1,9 +1,6 @@
-from urllib.parse import urlparse
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from django.core.mail import send_mail
 from django.contrib.auth.tokens import default_token_generator
-from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
@@ -12,19 +9,18 @@ from django.utils.translation import gettext_lazy as _
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
-import pandas as pd
-
 from rest_framework import viewsets, status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from group.models import Group
-from identity.models import User, Role
+from identity.models import EmailOutbox, ImportJob, User, Role
 from identity.serializers import (
     ChangePasswordSerializer,
     CustomTokenObtainPairSerializer,
     CustomTokenRefreshSerializer,
+    ImportJobSerializer,
     PasswordResetRequestSerializer,
     PasswordResetConfirmSerializer,
     TokenRefreshResponseSerializer,
@@ -87,80 +83,25 @@ class UserBulkUploadView(generics.CreateAPIView):
         if not file:
             return Response({"error": "No file provided."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # Check if the file is in CSV or Excel format
-            if file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            elif file.name.endswith('.xlsx'):
-                df = pd.read_excel(file)
-            else:
-                return Response({"error": "Unsupported file format. Please upload a CSV or Excel file."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Process the DataFrame with user data
-            return self.handle_user_data(df)
-
-        except Exception as e:
-            return Response({"error": f"Error processing the file: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-    def handle_user_data(self, df):
-        errors = []
-        users_to_create = []
-
-        df = df.where(pd.notnull(df), None)
-
-        for index, row in df.iterrows():
-            user_data = {
-                'email': row['email'],
-                'first_name': row['first_name'],
-                'last_name': row['last_name'],
-                'father_name': row['father_name'],
-                'gender': row['gender'],
-                'phone_number': row['phone_number'],
-                'passport_id': row['passport_id'],
-                'user_type': row['user_type'],
-                'bio': row.get('bio', None),
-                'instagram': self.validate_url(row.get('instagram')),
-                'facebook': self.validate_url(row.get('facebook')),
-                'twitter': self.validate_url(row.get('twitter')),
-                'github': self.validate_url(row.get('github')),
-                'youtube': self.validate_url(row.get('youtube')),
-                'linkedin': self.validate_url(row.get('linkedin')),
-                'address': row.get('address', None)
-            }
-
-            roles = row.get('roles', '')
-            if roles:
-                role_names = [role.strip() for role in roles.split(',')]
-                # Fetch roles based on name and convert to IDs
-                role_objects = Role.objects.filter(name__in=role_names)
-                user_data['roles'] = [role.id for role in role_objects]
-
-        # Return the response with errors (if any) and the list of created users
-        if errors:
-            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
-
-        with transaction.atomic():  # Start a new transaction
-            created_users = []
-            for user_data in users_to_create:
-                serializer = UserCreateUpdateSerializer(data=user_data)
-                if serializer.is_valid():
-                    user = serializer.save()  # Save user and check for errors
-                    send_registration_email(user)
-                    created_users.append(user.email)
-
-        return Response({"message": "Users created successfully", "created_users": created_users}, status=status.HTTP_201_CREATED)
-
-    def validate_url(self, url):
-        """
-        Validates that the provided URL is either None or a valid URL.
-        If the URL is invalid, returns None.
-        """
-        if not url:
-            return None
-        parsed = urlparse(url)
-        if all([parsed.scheme, parsed.netloc]):  # Valid URL has both scheme and netloc
-            return url
-        return None
+        # Check if the file is in CSV or Excel format
+        if not file.name.endswith(('.csv', '.xlsx')):
+            return Response({"error": "Unsupported file format. Please upload a CSV or Excel file."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The file is only stored, the run_import_jobs command imports it out of the request
+        job = ImportJob.objects.create(
+            kind=ImportJob.Kind.USERS,
+            file=file,
+            created_by=request.user if request.user.is_authenticated else None
+        )
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ImportJobDetailView(generics.RetrieveAPIView):
+    """
+    Report the status and the row progress of an import job, polled after an upload.
+    """
+    queryset = ImportJob.objects.all()
+    serializer_class = ImportJobSerializer
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -228,14 +169,14 @@ class PasswordResetRequestView(generics.GenericAPIView):
         # Construct reset link
         reset_link = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/"
 
-        # Send email
+        # Queue the email, it is sent by the send_outbox_emails command
         subject = "Password Reset Request"
         message = render_to_string('password_reset_email.html', {
             'user': user,
             'reset_link': reset_link,
         })
 
-        send_mail(subject, message, settings.EMAIL_HOST_USER, [user.email])
+        EmailOutbox.objects.enqueue(subject, message, [user.email], from_email=settings.EMAIL_HOST_USER)
 
         return Response({"detail": _("Password reset link has been sent to your email.")})
 
@@ -14,8 +14,8 @@ class UserPaymentAdmin(ImportExportModelAdmin):
 
 @admin.register(Payment)
 class PaymentAdmin(ImportExportModelAdmin):
-    list_display = ('id', 'user_full_name', 'user_passport_id', 'status', 'month', 'total_price', 'total_hours', 'created_at', 'updated_at')
-    list_filter = ('status', 'month', 'created_at')
+    list_display = ('id', 'user_full_name', 'user_passport_id', 'status', 'year', 'month', 'total_price', 'total_hours', 'created_at', 'updated_at')
+    list_filter = ('status', 'year', 'month', 'created_at')
     search_fields = ('user_full_name', 'user_passport_id')
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'updated_at')
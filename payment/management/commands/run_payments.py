@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payment.utils import run_payments
+
+
+class Command(BaseCommand):
+    help = "Create or refresh the payments of every user for a month from their rate periods."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, help="Year of the payment run, the current year by default.")
+        parser.add_argument("--month", type=int, help="Month of the payment run, the current month by default.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        year = options["year"] or today.year
+        month = options["month"] or today.month
+        if not (1 <= month <= 12):
+            raise CommandError("--month must be 1-12.")
+        if (year, month) > (today.year, today.month):
+            raise CommandError("Payments cannot be run for a month that has not started.")
+
+        result = run_payments(year, month)
+        self.stdout.write(self.style.SUCCESS(
+            f"Payment run of {month}/{year}: {result['created']} created, {result['updated']} updated, "
+            f"{result['skipped']} skipped."
+        ))
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0003_alter_userpayment_user_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='year',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='The year of the month the payment is associated with.', null=True, verbose_name='Year'),
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(fields=('year', 'month', 'user_passport_id'), name='payment_unique_user_month'),
+        ),
+    ]
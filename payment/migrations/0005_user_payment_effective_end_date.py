@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:34
+
+import datetime
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0004_payment_year'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userpayment',
+            name='effective_end_date',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce('end_date', models.Value(datetime.datetime(9999, 12, 31, 0, 0, tzinfo=datetime.timezone.utc))), help_text='The end date, or a far future date for ongoing periods, kept by the database.', output_field=models.DateTimeField(), verbose_name='Effective End Date'),
+        ),
+        migrations.AddIndex(
+            model_name='userpayment',
+            index=models.Index(fields=['user_passport_id', 'created_at', 'effective_end_date'], name='user_payment_user_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userpayment',
+            index=models.Index(fields=['effective_end_date', 'created_at'], name='user_payment_period_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+MONTHS = [
+    'january', 'february', 'march', 'april', 'may', 'june',
+    'july', 'august', 'september', 'october', 'november', 'december',
+]
+
+
+def backfill_year(apps, schema_editor):
+    """
+    Set the year of the payments created before it was recorded. A payment is created
+    during or after its month, so a month later in the year than the creation belongs to
+    the year before. Older payments of the same user and month go to the previous years.
+    """
+    Payment = apps.get_model('payment', 'Payment')
+
+    taken = set(
+        Payment.objects.filter(year__isnull=False).values_list('year', 'month', 'user_passport_id')
+    )
+    payments = []
+    for payment in Payment.objects.filter(year__isnull=True).order_by('-created_at'):
+        year = payment.created_at.year
+        if MONTHS.index(payment.month) + 1 > payment.created_at.month:
+            year -= 1
+        while (year, payment.month, payment.user_passport_id) in taken:
+            year -= 1
+        taken.add((year, payment.month, payment.user_passport_id))
+        payment.year = year
+        payments.append(payment)
+    Payment.objects.bulk_update(payments, ['year'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0005_user_payment_effective_end_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_year, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0006_backfill_payment_year'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='year',
+            field=models.PositiveSmallIntegerField(help_text='The year of the month the payment is associated with.', verbose_name='Year'),
+        ),
+    ]
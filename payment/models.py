@@ -1,9 +1,26 @@
+from datetime import datetime, timezone
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from identity.models import User
 from services.abstract_models import TimeStampedModel
 
 
+# Effective end date of the ongoing rate periods, so every period is a closed interval
+OPEN_END_DATE = datetime(9999, 12, 31, tzinfo=timezone.utc)
+
+
+class UserPaymentQuerySet(models.QuerySet):
+
+    def active_in(self, start, end):
+        """
+        Return the rate periods overlapping the range from `start` to `end`, both included,
+        ongoing periods included. Filter by `user_passport_id` first for a single user, both
+        lookups being index range scans.
+        """
+        return self.filter(created_at__lte=end, effective_end_date__gte=start)
+
 
 class UserPayment(TimeStampedModel):
     user_passport_id = models.CharField(
@@ -34,11 +51,24 @@ class UserPayment(TimeStampedModel):
         null=True,
         blank=True
     )
+    effective_end_date = models.GeneratedField(
+        verbose_name=_("Effective End Date"),
+        expression=Coalesce("end_date", models.Value(OPEN_END_DATE)),
+        output_field=models.DateTimeField(),
+        db_persist=True,
+        help_text=_("The end date, or a far future date for ongoing periods, kept by the database.")
+    )
+
+    objects = UserPaymentQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("User Payment")
         verbose_name_plural = _("User Payments")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user_passport_id', 'created_at', 'effective_end_date'], name='user_payment_user_period_idx'),
+            models.Index(fields=['effective_end_date', 'created_at'], name='user_payment_period_idx'),
+        ]
 
     def __str__(self):
         return f"Payment for {self.user_full_name} ({self.user_passport_id}) - {self.price_per_hour} AZN/hour"
@@ -81,6 +111,10 @@ class Payment(TimeStampedModel):
         default=Month.JANUARY,
         help_text=_("The month the payment is associated with.")
     )
+    year = models.PositiveSmallIntegerField(
+        verbose_name=_("Year"),
+        help_text=_("The year of the month the payment is associated with.")
+    )
     user_passport_id = models.CharField(
         verbose_name=_("User Passport ID"),
         max_length=15,
@@ -112,6 +146,9 @@ class Payment(TimeStampedModel):
         verbose_name = _("Payment")
         verbose_name_plural = _("Payments")
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month', 'user_passport_id'], name='payment_unique_user_month'),
+        ]
 
     def __str__(self):
         return f"Payment of {self.total_price} AZN for {self.user_full_name} ({self.user_passport_id})."
@@ -1,4 +1,4 @@
-from .views import PaymentListView, UserPaymentModalListView
+from .views import PaymentListView, PaymentRunView, UserPaymentModalListView
 from django.urls import path
 
 app_name = "payment"
@@ -6,5 +6,6 @@ app_name = "payment"
 
 urlpatterns = [
     path('payment_list/', PaymentListView.as_view(), name='payment_list'),
-    path('payment_modal_list/', UserPaymentModalListView.as_view(), name='payment_modal_list')
+    path('payment_modal_list/', UserPaymentModalListView.as_view(), name='payment_modal_list'),
+    path('payment_run/', PaymentRunView.as_view(), name='payment_run'),
 ]
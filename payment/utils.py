@@ -0,0 +1,146 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from payment.models import Payment, UserPayment
+from services.periods import get_month_bounds
+
+
+# Ongoing rate periods are counted up to the current time in Baku (UTC+4)
+ONGOING_OFFSET = timedelta(hours=4)
+
+CENT = Decimal("0.01")
+
+
+def get_payment_month_window(year, month):
+    """
+    Return the start of the month and its last day at midnight, the window the
+    rate periods of the payment modal are clipped to.
+    """
+    month_start, next_month_start = get_month_bounds(year, month)
+    return month_start, next_month_start - timedelta(days=1)
+
+
+def get_ongoing_end(month_end):
+    """
+    Return the date ongoing rate periods are counted up to in the month.
+    """
+    return min(month_end, timezone.now() + ONGOING_OFFSET)
+
+
+def clip_user_payment(user_payment, month_start, month_end, ongoing_end):
+    """
+    Clip a rate period to the month like the payment modal: a period ending on or after
+    the last day of the month runs to the end of the month, an ongoing one up to
+    `ongoing_end`. Returns the begin date, the finish date (None for an ongoing period)
+    and the hours of the clipped period.
+    """
+    begin_date = max(user_payment.created_at, month_start)
+    if user_payment.end_date:
+        finish_date = min(user_payment.end_date, month_end)
+        # The last day of the month is counted whole
+        if finish_date == month_end:
+            finish_date = finish_date + timedelta(days=1)
+        hours = Decimal((finish_date - begin_date).total_seconds() / 3600)
+        return begin_date, finish_date, hours
+
+    return begin_date, None, Decimal((ongoing_end - begin_date).total_seconds() / 3600)
+
+
+def calculate_payment_run(year, month):
+    """
+    Calculate the hours and the price of every user for the month in one pass
+    over the overlapping rate periods.
+
+    The periods are clipped to the month with vectorized NumPy operations, with
+    the rules of the payment modal: a period ending on or after the last day of
+    the month runs to the end of the month, an ongoing one up to now, the last
+    day excluded. Returns a dict mapping the passport ID to the full name, the
+    total hours and the total price of the user.
+    """
+    month_start, month_end = get_payment_month_window(year, month)
+    next_month_start = month_end + timedelta(days=1)
+    ongoing_end = get_ongoing_end(month_end)
+
+    rows = list(
+        UserPayment.objects.active_in(month_start, month_end)
+        .order_by("created_at")
+        .values_list("user_passport_id", "user_full_name", "created_at", "end_date", "price_per_hour")
+    )
+    if not rows:
+        return {}
+
+    passport_ids, full_names, created_at, end_date, price_per_hour = zip(*rows)
+    created_at = np.array([value.timestamp() for value in created_at])
+    end_date = np.array([value.timestamp() if value else np.nan for value in end_date])
+
+    begin = np.maximum(created_at, month_start.timestamp())
+    finish = np.where(end_date >= month_end.timestamp(), next_month_start.timestamp(), end_date)
+    finish = np.where(np.isnan(end_date), ongoing_end.timestamp(), finish)
+    # An ongoing period starting after now has no hours yet, and is left out
+    hours = np.maximum(finish - begin, 0) / 3600
+    worked = hours > 0
+    if not worked.any():
+        return {}
+    passport_ids = np.array(passport_ids)[worked]
+    full_names = np.array(full_names, dtype=object)[worked]
+    hours = hours[worked]
+    price_per_hour = np.array(price_per_hour, dtype=float)[worked]
+    # Prices are rounded to the manat thousandth per period, like the payment modal, and summed
+    # as integers so the totals round to the cent exactly
+    prices = np.rint(hours * price_per_hour * 1000)
+
+    users, user_index = np.unique(passport_ids, return_inverse=True)
+    total_hours = np.bincount(user_index, weights=hours, minlength=len(users))
+    total_prices = np.bincount(user_index, weights=prices, minlength=len(users))
+    # The rows are ordered by creation, so the latest full name of a user wins
+    user_full_names = dict(zip(passport_ids.tolist(), full_names.tolist()))
+
+    return {
+        passport_id: {
+            "user_full_name": user_full_names[passport_id],
+            "total_hours": Decimal(user_hours).quantize(CENT),
+            "total_price": Decimal(round(user_price)).scaleb(-3).quantize(CENT),
+        }
+        for passport_id, user_hours, user_price in zip(users.tolist(), total_hours.tolist(), total_prices.tolist())
+    }
+
+
+@transaction.atomic
+def run_payments(year, month):
+    """
+    Create or refresh the payments of every user for the month from their rate periods.
+
+    Payments that left the calculation (pending, paid, ...) are not changed. Returns
+    the number of created, updated and skipped payments.
+    """
+    totals = calculate_payment_run(year, month)
+    month_name = Payment.Month.values[month - 1]
+    payments = {
+        payment.user_passport_id: payment
+        for payment in Payment.objects.select_for_update().filter(year=year, month=month_name)
+    }
+
+    now = timezone.now()
+    to_save = []
+    skipped = 0
+    for passport_id, user_totals in totals.items():
+        payment = payments.get(passport_id)
+        if payment is not None and payment.status != Payment.Status.IN_CALCULATION:
+            skipped += 1
+            continue
+        to_save.append(Payment(year=year, month=month_name, user_passport_id=passport_id, updated_at=now, **user_totals))
+
+    # A single upsert on the (year, month, user) constraint creates and refreshes the payments
+    Payment.objects.bulk_create(
+        to_save,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["year", "month", "user_passport_id"],
+        update_fields=["user_full_name", "total_hours", "total_price", "updated_at"]
+    )
+    created = sum(1 for payment in to_save if payment.user_passport_id not in payments)
+    return {"created": created, "updated": len(to_save) - created, "skipped": skipped}
@@ -1,14 +1,14 @@
-from rest_framework.generics import ListAPIView
+from rest_framework.generics import CreateAPIView, ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from services.periods import MonthPeriodMixin
 from .models import Payment, UserPayment
-from .serializers import PaymentSerializer, UserPaymentModalSerializer
+from .serializers import PaymentRunSerializer, PaymentSerializer, UserPaymentModalSerializer
+from .utils import get_payment_month_window, run_payments
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
-from datetime import datetime, timedelta
-from django.utils.timezone import make_aware
 from decimal import Decimal
-from django.db.models import Q
 
 
 
@@ -18,7 +18,8 @@ class PaymentListView(ListAPIView):
 
     def get_queryset(self):
 
-        current_month = timezone.now().strftime('%B').lower()
+        now = timezone.now()
+        current_month = now.strftime('%B').lower()
 
         month = self.request.query_params.get('month')
         status = self.request.query_params.get('status')
@@ -39,7 +40,9 @@ class PaymentListView(ListAPIView):
                 self.queryset = pending_payments
                 return super().get_queryset()
 
-            in_calculation_payments = Payment.objects.filter(status=Payment.Status.IN_CALCULATION, month=current_month)
+            in_calculation_payments = Payment.objects.filter(
+                status=Payment.Status.IN_CALCULATION, year=now.year, month=current_month
+            )
             self.queryset = in_calculation_payments
             return super().get_queryset()
 
@@ -58,59 +61,61 @@ class PaymentListView(ListAPIView):
         return super().get_queryset()
 
 
-class UserPaymentModalListView(ListAPIView):
+class UserPaymentModalListView(MonthPeriodMixin, ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserPaymentModalSerializer
+    period_required_message = _("Year and Month are required.")
+    period_invalid_message = _("Invalid year or month format. Please use YYYY for year and MM for month.")
+
+    def build_period_window(self, year, month):
+        return get_payment_month_window(year, month)
 
     def get_queryset(self):
         passport_id = self.request.query_params.get('passport_id')
-        year = self.request.query_params.get('year')
-        month = self.request.query_params.get('month')
 
         if not passport_id:
             raise ValidationError({"detail": _("Passport ID is required.")})
-        if not year or not month:
-            raise ValidationError({"detail": _("Year and Month are required.")})
-
-        # Parse the year and month into a start and end date
-        try:
-            month_start = make_aware(datetime.strptime(f"{year}-{month}-01", "%Y-%m-%d"))
-            # Calculate the end of the month (get the last day of the month)
-            next_month = (month_start.month % 12) + 1
-            next_month_start = month_start.replace(month=next_month, day=1)
-            month_end = next_month_start - timedelta(days=1)  # Last day of the current month
-        except ValueError:
-            raise ValidationError({"detail": _("Invalid year or month format. Please use YYYY for year and MM for month.")})
-
-        # Filter for records that overlap with the selected month
-        queryset = UserPayment.objects.filter(
-            Q(user_passport_id=passport_id) & 
-            (
-                # End date is after the start of the month OR ongoing roles (null end_date)
-                Q(end_date__gte=month_start) | Q(end_date__isnull=True)
-            ) &
-            Q(created_at__lte=month_end)  # Created date should be before the end of the month
-        )
-
-        if not queryset.exists():
+
+        month_start, month_end = self.get_period_window()
+
+        # Filter for records that overlap with the selected month, ongoing roles included
+        return UserPayment.objects.filter(user_passport_id=passport_id).active_in(month_start, month_end)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+
+        # Checked on the fetched rows, instead of an extra query before them
+        if not rows:
             raise ValidationError({"detail": "No payment data found for this passport ID in the given month."})
 
-        return queryset
+        serializer = self.get_serializer(rows, many=True)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
 
     def get_serializer_context(self):
         # Add month_start and month_end to serializer context for date handling
-        year = self.request.query_params.get('year')
-        month = self.request.query_params.get('month')
-
-        try:
-            month_start = make_aware(datetime.strptime(f"{year}-{month}-01", "%Y-%m-%d"))
-            next_month = (month_start.month % 12) + 1
-            next_month_start = month_start.replace(month=next_month, day=1)
-            month_end = next_month_start - timedelta(days=1)
-        except ValueError:
-            raise ValidationError({"detail": _("Invalid year or month format. Please use YYYY for year and MM for month.")})
-
+        month_start, month_end = self.get_period_window()
         return {
+            **super().get_serializer_context(),
             'month_start': month_start,
             'month_end': month_end,
         }
+
+
+class PaymentRunView(CreateAPIView):
+    """
+    Generic view to create or refresh the payments of every user for a specific month and year.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = PaymentRunSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        year = serializer.validated_data['year']
+        month = serializer.validated_data['month']
+
+        return Response({"year": year, "month": month, **run_payments(year, month)})
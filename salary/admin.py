@@ -1,3 +1,25 @@
 from django.contrib import admin
+from .models import SalarySnapshot
+from import_export.admin import ExportMixin
 
 
+@admin.register(SalarySnapshot)
+class SalarySnapshotAdmin(ExportMixin, admin.ModelAdmin):
+    """
+    The snapshots hold the payroll of closed months, they are only recomputed by
+    refresh_salary_snapshots when the attendance of their month changes.
+    """
+    list_display = ('id', 'group', 'year', 'month', 'total_students', 'valid_attendance_count', 'group_total_salary', 'is_dirty', 'created_at', 'updated_at')
+    list_filter = ('year', 'month', 'is_dirty', 'group')
+    search_fields = ('group__group_name', 'group__teacher_passport_id', 'group__teacher_full_name')
+    list_select_related = ('group',)
+    ordering = ('-year', '-month')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,104 @@
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+
+from salary.utils import get_salary_details, get_salary_groups
+
+
+EXPORT_HEADERS = [
+    "Teacher Name",
+    "Teacher Passport ID",
+    "Group Name",
+    "Total Students",
+    "Valid Attendance Count",
+    "Total Present",
+    "Total Absent",
+    "Total Late",
+    "Total Excused",
+    "Group Salary",
+    "Per Student Salary",
+    "Total Per Student Salary",
+    "Group Total Salary",
+]
+
+
+class Echo:
+    """
+    File-like object whose write method returns the value, so csv.writer rows can be streamed.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_salary_rows(year, month, teacher_passport_ids=None):
+    """
+    Yield one export row per group of the payroll, ordered by teacher and group.
+    """
+    groups = list(get_salary_groups(teacher_passport_ids).order_by("teacher_full_name", "teacher_passport_id", "group_name"))
+    details_by_group = get_salary_details(groups, year, month)
+
+    for group in groups:
+        group_details = details_by_group[group.id]
+        attendance_summary = group_details["attendance_summary"]
+        yield [
+            group.teacher_full_name,
+            group.teacher_passport_id,
+            group.group_name,
+            group_details["total_students"],
+            group_details["valid_attendance_count"],
+            attendance_summary["total_present"],
+            attendance_summary["total_absent"],
+            attendance_summary["total_late"],
+            attendance_summary["total_excused"],
+            group_details["group_salary"],
+            group_details["per_student_salary"],
+            group_details["total_per_student_salary"],
+            group_details["group_total_salary"],
+        ]
+
+
+def export_salary_csv(year, month, teacher_passport_ids=None):
+    """
+    Stream the payroll of the month as a CSV file, row by row.
+    """
+    writer = csv.writer(Echo())
+    rows = iter_salary_rows(year, month, teacher_passport_ids)
+
+    def stream():
+        yield writer.writerow(EXPORT_HEADERS)
+        for row in rows:
+            yield writer.writerow(row)
+
+    return StreamingHttpResponse(
+        stream(),
+        content_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="teacher_salary_{year}_{month:02d}.csv"'},
+    )
+
+
+def export_salary_xlsx(year, month, teacher_passport_ids=None):
+    """
+    Export the payroll of the month as an XLSX file.
+
+    The workbook is written in openpyxl's write-only mode to a temporary file,
+    which is then streamed, so memory does not grow with the number of rows.
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=f"{year}-{month:02d}")
+    worksheet.append(EXPORT_HEADERS)
+    for row in iter_salary_rows(year, month, teacher_passport_ids):
+        worksheet.append(row)
+
+    file = tempfile.TemporaryFile()
+    workbook.save(file)
+    file.seek(0)
+
+    return FileResponse(
+        file,
+        as_attachment=True,
+        filename=f"teacher_salary_{year}_{month:02d}.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
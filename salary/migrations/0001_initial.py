@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:54
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('group', '0008_group_group_salary_for_teacher_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalarySnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Year')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Month')),
+                ('total_students', models.PositiveIntegerField(default=0, verbose_name='Total Students')),
+                ('valid_attendance_count', models.PositiveIntegerField(default=0, help_text='Attendance count paid to the teacher, with absences capped at 2 per student.', verbose_name='Valid Attendance Count')),
+                ('total_absent', models.PositiveIntegerField(default=0, verbose_name='Total Absent')),
+                ('total_present', models.PositiveIntegerField(default=0, verbose_name='Total Present')),
+                ('total_late', models.PositiveIntegerField(default=0, verbose_name='Total Late')),
+                ('total_excused', models.PositiveIntegerField(default=0, verbose_name='Total Excused')),
+                ('group_salary', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Group Salary')),
+                ('per_student_salary', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Per Student Salary')),
+                ('total_per_student_salary', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Total Per Student Salary')),
+                ('group_total_salary', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Group Total Salary')),
+                ('is_dirty', models.BooleanField(default=True, help_text='Designates whether the attendance of this group changed since the snapshot was computed.', verbose_name='Dirty')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='salary_snapshots', to='group.group', verbose_name='Group')),
+            ],
+            options={
+                'verbose_name': 'Salary Snapshot',
+                'verbose_name_plural': 'Salary Snapshots',
+                'indexes': [models.Index(fields=['year', 'month'], name='salary_snapshot_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('group', 'year', 'month'), name='unique_salary_snapshot_per_group_and_month')],
+            },
+        ),
+    ]
@@ -1,2 +1,123 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+from group.models import Group
+from services.abstract_models import TimeStampedModel
 
+
+class SalarySnapshotQuerySet(models.QuerySet):
+
+    def mark_dirty(self, user_group_ids, year, month):
+        """
+        Mark the snapshots of the user groups' groups for the given month as dirty,
+        so they are recomputed the next time the month is requested.
+        """
+        return self.filter(
+            group__user_groups__in=user_group_ids,
+            year=year,
+            month=month,
+            is_dirty=False
+        ).update(is_dirty=True)
+
+
+class SalarySnapshot(TimeStampedModel):
+    group = models.ForeignKey(
+        to=Group,
+        on_delete=models.CASCADE,
+        related_name="salary_snapshots",
+        verbose_name=_("Group")
+    )
+    year = models.PositiveSmallIntegerField(
+        verbose_name=_("Year")
+    )
+    month = models.PositiveSmallIntegerField(
+        verbose_name=_("Month")
+    )
+    total_students = models.PositiveIntegerField(
+        verbose_name=_("Total Students"),
+        default=0
+    )
+    valid_attendance_count = models.PositiveIntegerField(
+        verbose_name=_("Valid Attendance Count"),
+        default=0,
+        help_text=_("Attendance count paid to the teacher, with absences capped at 2 per student.")
+    )
+    total_absent = models.PositiveIntegerField(
+        verbose_name=_("Total Absent"),
+        default=0
+    )
+    total_present = models.PositiveIntegerField(
+        verbose_name=_("Total Present"),
+        default=0
+    )
+    total_late = models.PositiveIntegerField(
+        verbose_name=_("Total Late"),
+        default=0
+    )
+    total_excused = models.PositiveIntegerField(
+        verbose_name=_("Total Excused"),
+        default=0
+    )
+    group_salary = models.DecimalField(
+        verbose_name=_("Group Salary"),
+        max_digits=12,
+        decimal_places=2,
+        default=0
+    )
+    per_student_salary = models.DecimalField(
+        verbose_name=_("Per Student Salary"),
+        max_digits=12,
+        decimal_places=2,
+        default=0
+    )
+    total_per_student_salary = models.DecimalField(
+        verbose_name=_("Total Per Student Salary"),
+        max_digits=12,
+        decimal_places=2,
+        default=0
+    )
+    group_total_salary = models.DecimalField(
+        verbose_name=_("Group Total Salary"),
+        max_digits=12,
+        decimal_places=2,
+        default=0
+    )
+    is_dirty = models.BooleanField(
+        verbose_name=_("Dirty"),
+        default=True,
+        help_text=_("Designates whether the attendance of this group changed since the snapshot was computed.")
+    )
+
+    objects = SalarySnapshotQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.group} - {self.month}/{self.year}"
+
+    def get_details(self, group_name):
+        """
+        Return the stored salary details of the snapshot in the shape used by the salary calculation.
+        """
+        return {
+            "group_name": group_name,
+            "group_salary": self.group_salary,
+            "per_student_salary": self.per_student_salary,
+            "total_students": self.total_students,
+            "valid_attendance_count": self.valid_attendance_count,
+            "total_per_student_salary": self.total_per_student_salary,
+            "group_total_salary": self.group_total_salary,
+            "attendance_summary": {
+                "total_absent": self.total_absent,
+                "total_present": self.total_present,
+                "total_late": self.total_late,
+                "total_excused": self.total_excused,
+            },
+        }
+
+    class Meta:
+        verbose_name = _("Salary Snapshot")
+        verbose_name_plural = _("Salary Snapshots")
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'year', 'month'], name='unique_salary_snapshot_per_group_and_month')
+        ]
+        indexes = [
+            models.Index(fields=['year', 'month'], name='salary_snapshot_period_idx')
+        ]
@@ -0,0 +1,17 @@
+from collections import defaultdict
+from django.dispatch import receiver
+from attendance.signals import attendance_changed
+from salary.models import SalarySnapshot
+
+
+@receiver(attendance_changed)
+def mark_salary_snapshots_dirty_on_attendance_change(sender, added, removed, **kwargs):
+    """
+    Mark the salary snapshots of the months the changed attendance belongs to as dirty.
+    """
+    user_group_ids_by_period = defaultdict(set)
+    for user_group_id, date, status in [*added, *removed]:
+        user_group_ids_by_period[(date.year, date.month)].add(user_group_id)
+
+    for (year, month), user_group_ids in user_group_ids_by_period.items():
+        SalarySnapshot.objects.mark_dirty(user_group_ids, year, month)
@@ -1,3 +1,130 @@
+from datetime import date
+
 from django.test import TestCase
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from attendance.models import Attendance
+from group.models import Group, UserGroup
+from identity.models import User
+from salary.models import SalarySnapshot
+
+
+class TeacherSalaryViewQueryCountTests(TestCase):
+    """
+    The teacher payroll is computed with a fixed number of queries, whatever the number of groups.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("salary:teacher_salary")
+
+    def create_groups(self, count, year, month):
+        for index in range(Group.objects.count(), Group.objects.count() + count):
+            group = Group.objects.create(
+                group_name=f"Group {index}",
+                teacher_passport_id="TEACHER1",
+                teacher_full_name="Teacher",
+                start_date=date(2020, 1, 1),
+                group_salary_for_teacher=100,
+                per_student_salary_for_teacher=5,
+            )
+            user_group = UserGroup.objects.create(
+                group=group,
+                student_passport_id=f"STUDENT{index}",
+                student_full_name=f"Student {index}",
+            )
+            Attendance.objects.create(user_group=user_group, date=date(year, month, 1), status=Attendance.Status.PRESENT)
+
+    def assert_constant_queries(self, year, month, num):
+        self.create_groups(1, year, month)
+        with self.assertNumQueries(num):
+            response = self.client.post(self.url, {"year": year, "month": month}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data[0]["groups"]), 1)
+
+        self.create_groups(9, year, month)
+        with self.assertNumQueries(num):
+            response = self.client.post(self.url, {"year": year, "month": month}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data[0]["groups"]), 10)
+
+    def test_current_month(self):
+        today = timezone.localdate()
+        # The groups and the monthly attendance counters
+        self.assert_constant_queries(today.year, today.month, 2)
+
+    def test_closed_month(self):
+        # The groups, the snapshots, the creation of the missing ones, the claim of the stale ones,
+        # their counters, the reload and the bulk update of the claimed snapshots
+        self.assert_constant_queries(2024, 1, 7)
+
+
+class ClosedMonthSalaryTests(TestCase):
+    """
+    A closed month is paid at the rates its snapshot was computed with.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("salary:teacher_salary")
+        self.group = Group.objects.create(
+            group_name="Group A",
+            teacher_passport_id="TEACHER1",
+            teacher_full_name="Teacher",
+            start_date=date(2020, 1, 1),
+            group_salary_for_teacher=100,
+            per_student_salary_for_teacher=5,
+        )
+        self.user_group = UserGroup.objects.create(
+            group=self.group,
+            student_passport_id="STUDENT1",
+            student_full_name="Student",
+        )
+        Attendance.objects.create(user_group=self.user_group, date=date(2024, 1, 1), status=Attendance.Status.PRESENT)
+
+    def get_total_salary(self):
+        response = self.client.post(self.url, {"year": 2024, "month": 1}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.data[0]["total_teacher_salary"]
+
+    def test_rates_kept(self):
+        self.assertEqual(self.get_total_salary(), 105)
+
+        self.group.group_salary_for_teacher = 200
+        self.group.per_student_salary_for_teacher = 10
+        self.group.save()
+        self.assertEqual(self.get_total_salary(), 105)
+
+        # A recomputation after an attendance change keeps the rates too
+        Attendance.objects.create(user_group=self.user_group, date=date(2024, 1, 2), status=Attendance.Status.PRESENT)
+        self.assertEqual(self.get_total_salary(), 110)
+
+
+class SalarySnapshotAdminTests(TestCase):
+    """
+    The payroll snapshots of closed months cannot be edited from the admin.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(email="admin@example.com", password="password")
+        self.client.force_login(self.user)
+
+    def test_read_only(self):
+        group = Group.objects.create(
+            group_name="Group A",
+            teacher_passport_id="TEACHER1",
+            teacher_full_name="Teacher",
+            start_date=date(2020, 1, 1),
+            group_salary_for_teacher=100,
+        )
+        snapshot = SalarySnapshot.objects.create(group=group, year=2024, month=1, group_total_salary=100)
+        change_url = reverse("admin:salary_salarysnapshot_change", args=[snapshot.pk])
 
-# Create your tests here.
+        self.assertEqual(self.client.get(reverse("admin:salary_salarysnapshot_add")).status_code, 403)
+        self.assertEqual(self.client.post(change_url, {"group_total_salary": 1000}).status_code, 403)
+        with self.assertRaises(NoReverseMatch):
+            reverse("admin:salary_salarysnapshot_import")
+        snapshot.refresh_from_db()
+        self.assertEqual(snapshot.group_total_salary, 100)
@@ -1,10 +1,12 @@
 from django.urls import path
-from salary.views import TeacherSalaryView
+from salary.views import TeacherSalaryExportView, TeacherSalaryReportView, TeacherSalaryView
 
 
 app_name = "salary"
 
 urlpatterns = [
     path('teacher_salary/', TeacherSalaryView.as_view(), name='teacher_salary'),
+    path('teacher_salary/export/', TeacherSalaryExportView.as_view(), name='teacher_salary_export'),
+    path('teacher_salary/report/', TeacherSalaryReportView.as_view(), name='teacher_salary_report'),
 
 ]
@@ -0,0 +1,290 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from attendance.models import Attendance, MonthlyAttendanceCounter
+from group.models import Group
+from salary.models import SalarySnapshot
+
+
+# Only the first 2 absences of a student are paid to the teacher
+MAX_PAID_ABSENCES = 2
+
+STATUS_TOTALS = {
+    "total_absent": Attendance.Status.ABSENT,
+    "total_present": Attendance.Status.PRESENT,
+    "total_late": Attendance.Status.LATE,
+    "total_excused": Attendance.Status.EXCUSED,
+}
+
+SNAPSHOT_FIELDS = [
+    *STATUS_TOTALS,
+    "total_students",
+    "valid_attendance_count",
+    "group_salary",
+    "per_student_salary",
+    "total_per_student_salary",
+    "group_total_salary",
+    "updated_at",
+]
+
+
+def is_closed_month(year, month):
+    """
+    Return True if the month is over, so its attendance is not expected to change anymore.
+    """
+    today = timezone.localdate()
+    return (year, month) < (today.year, today.month)
+
+
+def get_salary_groups(teacher_passport_ids=None):
+    """
+    Return the active groups a payroll is calculated for.
+    """
+    groups = Group.objects.filter(status=Group.Status.ACTIVE)
+    if teacher_passport_ids:
+        groups = groups.filter(teacher_passport_id__in=teacher_passport_ids)
+    return groups
+
+
+def empty_group_stats():
+    stats = {name: 0 for name in STATUS_TOTALS}
+    stats["total_students"] = 0
+    stats["valid_attendance_count"] = 0
+    return stats
+
+
+def get_group_attendance_stats(year, month, groups):
+    """
+    Collect the attendance statistics of every group in `groups` for the month
+    with a single indexed query over the monthly attendance counters.
+
+    Returns a dict mapping group id to its status totals, the number of students
+    with attendance and the valid (paid) attendance count.
+    """
+    student_attendance = (
+        MonthlyAttendanceCounter.objects
+        .filter(user_group__group__in=groups, year=year, month=month)
+        .exclude(present=0, absent=0, late=0, excused=0)
+        .values("user_group__group_id", *STATUS_TOTALS.values())
+    )
+
+    stats_by_group = defaultdict(empty_group_stats)
+    for student in student_attendance:
+        stats = stats_by_group[student["user_group__group_id"]]
+        for name, status in STATUS_TOTALS.items():
+            stats[name] += student[status]
+        stats["total_students"] += 1
+
+        # If a student has 3 or more absences, only the first 2 are considered
+        stats["valid_attendance_count"] += (
+            min(student[Attendance.Status.ABSENT], MAX_PAID_ABSENCES)
+            + student[Attendance.Status.PRESENT]
+            + student[Attendance.Status.LATE]
+            + student[Attendance.Status.EXCUSED]
+        )
+
+    return stats_by_group
+
+
+def get_group_rates(group):
+    """
+    Return the current group salary and per student salary of the teacher of `group`.
+    """
+    return group.group_salary_for_teacher or 0, group.per_student_salary_for_teacher or 0
+
+
+def build_group_details(group, stats, rates=None):
+    """
+    Build the salary details of a single group from its attendance statistics, with
+    the current rates of the group unless other (group salary, per student salary)
+    `rates` are given.
+    """
+    group_salary, per_student_salary = rates or get_group_rates(group)
+    total_per_student_salary = per_student_salary * stats["valid_attendance_count"]
+    total_salary = group_salary + total_per_student_salary
+
+    return {
+        "group_name": group.group_name,
+        "group_salary": group_salary,
+        "per_student_salary": per_student_salary,
+        "total_students": stats["total_students"],
+        "valid_attendance_count": stats["valid_attendance_count"],
+        "total_per_student_salary": total_per_student_salary,
+        "group_total_salary": total_salary,
+        "attendance_summary": {name: stats[name] for name in STATUS_TOTALS},
+    }
+
+
+def aggregate_teacher_salaries(groups, details_by_group, year, month):
+    """
+    Aggregate the group salaries by teacher, keeping the order of `groups`.
+    """
+    teacher_salary_aggregation = {}
+
+    for group in groups:
+        group_details = details_by_group[group.id]
+        total_salary = group_details["group_total_salary"]
+
+        if group.teacher_passport_id not in teacher_salary_aggregation:
+            teacher_salary_aggregation[group.teacher_passport_id] = {
+                "teacher_name": group.teacher_full_name,
+                "teacher_passport_id": group.teacher_passport_id,
+                "month": month,
+                "year": year,
+                "total_teacher_salary": total_salary,
+                "groups": [group_details],
+            }
+        else:
+            teacher_salary_aggregation[group.teacher_passport_id]["total_teacher_salary"] += total_salary
+            teacher_salary_aggregation[group.teacher_passport_id]["groups"].append(group_details)
+
+    return list(teacher_salary_aggregation.values())
+
+
+def refresh_salary_snapshots(groups, year, month):
+    """
+    Return the salary snapshots of `groups` for the month, keyed by group id.
+
+    Only the snapshots that are missing or marked dirty by an attendance change
+    are recomputed, with a single grouped attendance query for all of them. A new
+    snapshot takes the current rates of its group, a recomputed one keeps the rates
+    it was first computed with, so editing a group does not change closed months.
+    """
+    group_by_id = {group.id: group for group in groups}
+    snapshots = {
+        snapshot.group_id: snapshot
+        for snapshot in SalarySnapshot.objects.filter(group_id__in=group_by_id, year=year, month=month)
+    }
+    stale_group_ids = [
+        group_id for group_id in group_by_id
+        if group_id not in snapshots or snapshots[group_id].is_dirty
+    ]
+    if not stale_group_ids:
+        return snapshots
+
+    SalarySnapshot.objects.bulk_create(
+        [
+            SalarySnapshot(group_id=group_id, year=year, month=month)
+            for group_id in stale_group_ids
+            if group_id not in snapshots
+        ],
+        ignore_conflicts=True
+    )
+    # Clear the dirty marker before computing, so attendance changed meanwhile marks it again
+    SalarySnapshot.objects.filter(group_id__in=stale_group_ids, year=year, month=month).update(is_dirty=False)
+
+    stats_by_group = get_group_attendance_stats(year, month, stale_group_ids)
+
+    stale_snapshots = list(SalarySnapshot.objects.filter(group_id__in=stale_group_ids, year=year, month=month))
+    now = timezone.now()
+    for snapshot in stale_snapshots:
+        stats = stats_by_group.get(snapshot.group_id) or empty_group_stats()
+        rates = None if snapshot.group_id not in snapshots else (snapshot.group_salary, snapshot.per_student_salary)
+        group_details = build_group_details(group_by_id[snapshot.group_id], stats, rates)
+
+        for name, value in stats.items():
+            setattr(snapshot, name, value)
+        snapshot.group_salary = group_details["group_salary"]
+        snapshot.per_student_salary = group_details["per_student_salary"]
+        snapshot.total_per_student_salary = group_details["total_per_student_salary"]
+        snapshot.group_total_salary = group_details["group_total_salary"]
+        snapshot.updated_at = now
+        snapshots[snapshot.group_id] = snapshot
+
+    SalarySnapshot.objects.bulk_update(stale_snapshots, SNAPSHOT_FIELDS)
+    return snapshots
+
+
+def get_salary_details(groups, year, month):
+    """
+    Return the salary details of `groups` for the month, keyed by group id.
+
+    Closed months are served from the amounts stored in the salary snapshots, which
+    are only recomputed for the groups whose attendance changed since they were computed.
+    """
+    if is_closed_month(year, month):
+        snapshots = refresh_salary_snapshots(groups, year, month)
+        return {group.id: snapshots[group.id].get_details(group.group_name) for group in groups}
+
+    stats_by_group = get_group_attendance_stats(year, month, [group.id for group in groups])
+    return {group.id: build_group_details(group, stats_by_group.get(group.id) or empty_group_stats()) for group in groups}
+
+
+def calculate_teacher_salaries(year, month, teacher_passport_ids=None):
+    """
+    Calculate the aggregated teacher salaries for a month.
+
+    Runs a constant number of queries whatever the number of groups.
+    """
+    groups = list(get_salary_groups(teacher_passport_ids))
+    details_by_group = get_salary_details(groups, year, month)
+    return aggregate_teacher_salaries(groups, details_by_group, year, month)
+
+
+def calculate_teacher_salaries_in_worker(year, month, teacher_passport_ids=None):
+    """
+    Calculate the teacher salaries of a month in a pool thread, closing the
+    thread's own database connection once done.
+    """
+    try:
+        return calculate_teacher_salaries(year, month, teacher_passport_ids)
+    finally:
+        connections.close_all()
+
+
+def get_month_periods(start, end):
+    """
+    Return the (year, month) pairs from `start` to `end`, both included.
+    """
+    year, month = start
+    periods = []
+    while (year, month) <= end:
+        periods.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return periods
+
+
+def calculate_teacher_salary_report(start, end, teacher_passport_ids=None):
+    """
+    Calculate the teacher salaries of every month from `start` to `end` (both
+    (year, month) pairs) as a per-teacher, per-month matrix with totals.
+
+    The months are calculated in parallel by a thread pool of
+    SALARY_REPORT_MAX_WORKERS threads, each with its own database connection.
+    """
+    periods = get_month_periods(start, end)
+    labels = [f"{year}-{month:02d}" for year, month in periods]
+
+    max_workers = min(settings.SALARY_REPORT_MAX_WORKERS, len(periods))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        monthly_salaries = list(executor.map(
+            lambda period: calculate_teacher_salaries_in_worker(*period, teacher_passport_ids),
+            periods
+        ))
+
+    teachers = {}
+    month_totals = dict.fromkeys(labels, 0)
+    for label, salaries in zip(labels, monthly_salaries):
+        for teacher_salary in salaries:
+            teacher = teachers.setdefault(teacher_salary["teacher_passport_id"], {
+                "teacher_name": teacher_salary["teacher_name"],
+                "teacher_passport_id": teacher_salary["teacher_passport_id"],
+                "months": dict.fromkeys(labels, 0),
+                "total_teacher_salary": 0,
+            })
+            teacher["months"][label] = teacher_salary["total_teacher_salary"]
+            teacher["total_teacher_salary"] += teacher_salary["total_teacher_salary"]
+            month_totals[label] += teacher_salary["total_teacher_salary"]
+
+    return {
+        "start": labels[0],
+        "end": labels[-1],
+        "months": labels,
+        "teachers": list(teachers.values()),
+        "month_totals": month_totals,
+        "total_salary": sum(month_totals.values()),
+    }
@@ -0,0 +1,91 @@
+from datetime import date, datetime, time
+
+from django.utils.text import format_lazy
+from django.utils.timezone import make_aware
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+
+# Years accepted for a period, the end of December 9999 being after the last supported date
+MIN_YEAR = 1
+MAX_YEAR = 9998
+
+PERIOD_REQUIRED_MESSAGE = _("Both 'month' and 'year' are required.")
+PERIOD_INVALID_MESSAGE = format_lazy(
+    _("Invalid 'month' or 'year'. Month must be 1-12, year {min_year}-{max_year}."),
+    min_year=MIN_YEAR,
+    max_year=MAX_YEAR
+)
+
+
+def parse_month_period(year, month, error_key="detail", required_message=PERIOD_REQUIRED_MESSAGE,
+                       invalid_message=PERIOD_INVALID_MESSAGE):
+    """
+    Validate a year and a month and return them as a (year, month) pair of integers.
+    """
+    if not year or not month:
+        raise ValidationError({error_key: required_message})
+
+    try:
+        year = int(year)
+        month = int(month)
+        if not (1 <= month <= 12) or not (MIN_YEAR <= year <= MAX_YEAR):
+            raise ValueError
+    except ValueError:
+        raise ValidationError({error_key: invalid_message})
+
+    return year, month
+
+
+def get_month_range(year, month):
+    """
+    Return the first day of the month and the first day of the next month,
+    to filter dates with a half-open range the date indexes can be used for.
+    """
+    next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return date(year, month, 1), next_month
+
+
+def get_month_bounds(year, month):
+    """
+    Return the start of the month and the start of the next month as aware datetimes.
+    """
+    month_start, next_month = get_month_range(year, month)
+    return make_aware(datetime.combine(month_start, time())), make_aware(datetime.combine(next_month, time()))
+
+
+class MonthPeriodMixin:
+    """
+    Resolve the 'year' and 'month' of a request once, caching the period and its window
+    on the request, so the queryset, the serializer context and the response share them.
+    """
+    # Attribute of the request the period is read from, 'query_params' or 'data'
+    period_source = "query_params"
+    period_error_key = "detail"
+    period_required_message = PERIOD_REQUIRED_MESSAGE
+    period_invalid_message = PERIOD_INVALID_MESSAGE
+
+    def get_period(self):
+        request = self.request
+        if not hasattr(request, "month_period"):
+            params = getattr(request, self.period_source)
+            request.month_period = parse_month_period(
+                params.get("year"),
+                params.get("month"),
+                self.period_error_key,
+                self.period_required_message,
+                self.period_invalid_message
+            )
+        return request.month_period
+
+    def get_period_window(self):
+        request = self.request
+        if not hasattr(request, "month_window"):
+            request.month_window = self.build_period_window(*self.get_period())
+        return request.month_window
+
+    def build_period_window(self, year, month):
+        """
+        Return the datetimes bounding the period, the start and the end of the month by default.
+        """
+        return get_month_bounds(year, month)
@@ -0,0 +1,30 @@
+import uuid
+
+from django.db import models
+
+
+class ClaimQuerySet(models.QuerySet):
+    """
+    QuerySet of a model whose rows are claimed by concurrent workers, the model having
+    a nullable `claim_token` UUIDField.
+    """
+
+    def claim(self, limit, **changes):
+        """
+        Claim up to `limit` rows of this ordered queryset for the calling worker and
+        return them, or an empty list once none is left.
+
+        The rows are picked, then updated with `changes` and a new claim token by a
+        conditional update only matching the ones still in this queryset, so a row
+        claimed by another worker meanwhile is skipped without row locks, which SQLite
+        does not have. `changes` must take the claimed rows out of this queryset.
+        The pick is retried while every picked row is lost to another worker.
+        """
+        while True:
+            ids = list(self.values_list("pk", flat=True)[:limit])
+            if not ids:
+                return []
+
+            token = uuid.uuid4()
+            if self.filter(pk__in=ids).update(claim_token=token, **changes):
+                return list(self.model._default_manager.filter(claim_token=token).order_by(*self.query.order_by))